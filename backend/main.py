@@ -1,31 +1,55 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response, Depends
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
-import uuid
+from starlette.background import BackgroundTask
+from pydantic import TypeAdapter
+from contextlib import asynccontextmanager, aclosing
+import asyncio
+import secrets
+import time
+import hashlib
 from datetime import datetime
-from typing import List
+from typing import List, Dict, Tuple, Optional
 import os
+import re
+import queue
+import orjson
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 from backend.src.models.schemas import (
     ResearchRequest,
     ResearchResponse,
     ReportRequest,
     ReportResponse,
-    ResearchStatus,
-    ResearchData
+    ResearchStatus
 )
-from backend.src.services.agent import agent
-from backend.src.services.search import search_service
-from backend.src.services.vector_store import vector_store
-from backend.src.services.pdf_generator import pdf_generator
+from backend.src.utils.cache import TTLCache
 from config.settings import settings
 
+# PDF worker processes (spawn/forkserver) re-import the script that started the
+# app as __mp_main__ when it was run as `python backend/main.py`; they only need
+# the report builder, so services and log handlers are built in the app process
+if __name__ != "__mp_main__":
+    from backend.src.services.agent import agent
+    from backend.src.services.search import search_service
+    from backend.src.services.vector_store import vector_store, parse_document
+    from backend.src.services.pdf_generator import pdf_generator
+
 # Configure logging
+log_listener: Optional[QueueListener] = None
+
+
 def setup_logging():
-    """Setup comprehensive logging"""
+    """
+    Setup comprehensive logging
+    
+    Records are pushed onto a queue by the root logger and written to the
+    console/file handlers by a background QueueListener thread, so request
+    handlers never block on disk I/O or log rotation.
+    """
+    global log_listener
+    
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
     # Create logs directory
@@ -45,15 +69,96 @@ def setup_logging():
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(logging.Formatter(log_format))
     
-    # Root logger configuration
+    # Hand records off to a background thread
+    log_queue = queue.Queue(-1)
+    if log_listener is not None:
+        log_listener.stop()
+    log_listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        respect_handler_level=True
+    )
+    log_listener.start()
+    
+    # Root logger configuration (replace queue handler from a previous setup)
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    root_logger.addHandler(QueueHandler(log_queue))
     
     return logging.getLogger(__name__)
 
-logger = setup_logging()
+if __name__ != "__mp_main__":
+    logger = setup_logging()
+
+
+# Report filenames that /download will serve (no path separators)
+_SAFE_FILENAME = re.compile(r'^[A-Za-z0-9._-]+\.pdf$')
+
+
+def _extract_summary(research_data: Dict) -> str:
+    """Get research summary from metadata, falling back to the stored document"""
+    summary = research_data['metadata'].get('summary')
+    if summary is not None:
+        return summary
+    
+    return parse_document(research_data['document']).get('summary', "")
+
+
+# Recently submitted research: cache key -> research_id
+_research_cache = TTLCache(
+    max_entries=settings.RESEARCH_CACHE_MAX_ENTRIES,
+    ttl=settings.RESEARCH_CACHE_TTL
+)
+
+
+def _research_cache_key(request: ResearchRequest) -> str:
+    """Build cache key from normalized topic and research parameters"""
+    normalized_topic = " ".join(request.topic.lower().split())
+    raw_key = f"{normalized_topic}|{request.depth}|{request.max_results}"
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+# History responses: limit -> (history, cached_at monotonic)
+HISTORY_CACHE_TTL = 30  # seconds
+_history_cache: Dict[int, Tuple[List[Dict], float]] = {}
+_history_cache_lock = asyncio.Lock()
+
+
+# Submitted research whose stub is not yet in ChromaDB: research_id -> entry
+_pending_research: Dict[str, Dict] = {}
+
+
+async def _get_research(research_id: str) -> Optional[Dict]:
+    """Get research from ChromaDB, falling back to not-yet-persisted stubs"""
+    research_data = await vector_store.get_research(research_id)
+    if research_data is None:
+        research_data = _pending_research.get(research_id)
+    return research_data
+
+
+async def _persist_research_stub(research_id: str, stub: Dict):
+    """Write a pending research stub to ChromaDB after the response is sent"""
+    try:
+        await vector_store.store_research(research_id, stub)
+        _invalidate_history_cache()
+    except Exception as e:
+        logger.error("[ERROR] Failed to store research stub %s: %s", research_id, e)
+    finally:
+        _pending_research.pop(research_id, None)
+
+
+def request_clock() -> datetime:
+    """Request timestamp dependency, evaluated once per request"""
+    return datetime.now()
+
+
+def _invalidate_history_cache():
+    """Drop cached history after research entries change"""
+    _history_cache.clear()
 
 
 # Lifespan context manager for startup/shutdown
@@ -62,11 +167,12 @@ async def lifespan(app: FastAPI):
     """Lifespan events for FastAPI app"""
     # Startup
     logger.info("=" * 60)
-    logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
-    logger.info(f"ChromaDB path: {settings.CHROMA_DB_PATH}")
-    logger.info(f"Reports path: {settings.REPORTS_PATH}")
-    logger.info(f"AI Model: {settings.GEMINI_MODEL}")
-    logger.info(f"Max Search Results: {settings.MAX_SEARCH_RESULTS}")
+    logger.info("Starting %s v%s", settings.APP_NAME, settings.APP_VERSION)
+    logger.info("ChromaDB path: %s", settings.CHROMA_DB_PATH)
+    logger.info("Reports path: %s", settings.REPORTS_PATH)
+    logger.info("AI Model: %s", settings.GEMINI_MODEL)
+    logger.info("Max Search Results: %s", settings.MAX_SEARCH_RESULTS)
+    logger.info("Registered routes: %s", len(app.routes))
     logger.info("=" * 60)
     
     # Ensure directories exist
@@ -76,11 +182,26 @@ async def lifespan(app: FastAPI):
     
     logger.info("[OK] All directories initialized")
     
+    # One-time move of research stored before the cosine collection existed
+    try:
+        await asyncio.to_thread(vector_store.migrate_legacy_collection)
+    except Exception as e:
+        logger.error("[ERROR] Legacy collection migration failed: %s", e, exc_info=True)
+    
+    await agent.warm_up()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AI Research Agent")
     logger.info("=" * 60)
+    
+    # Waits for in-flight reports; keep the event loop free meanwhile
+    await asyncio.to_thread(pdf_generator.shutdown)
+    
+    # Flush queued log records
+    if log_listener is not None:
+        log_listener.stop()
 
 
 # Initialize FastAPI app
@@ -88,92 +209,103 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="AI-powered research agent with RAG and PDF generation",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware (only needed when a browser frontend is served from another origin)
+if settings.ALLOWED_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["content-type", "authorization"],
+        max_age=86400,  # let browsers cache preflight responses for a day
+    )
+
+
+# Response models are already validated on construction; these adapters
+# serialize them directly instead of FastAPI re-validating via response_model
+RESEARCH_RESPONSE_ADAPTER = TypeAdapter(ResearchResponse)
+REPORT_RESPONSE_ADAPTER = TypeAdapter(ReportResponse)
+
+
+def _json_response(adapter: TypeAdapter, obj) -> ORJSONResponse:
+    """Serialize a response model with a prebuilt TypeAdapter"""
+    return ORJSONResponse(adapter.dump_python(obj, mode="json"))
+
+
+# Static response bodies, encoded once at import
+_ROOT_PAYLOAD = orjson.dumps({
+    "message": f"Welcome to {settings.APP_NAME}",
+    "version": settings.APP_VERSION,
+    "endpoints": {
+        "research": "/research - Conduct research on a topic",
+        "research_stream": "/research/stream - Stream AI analysis of a topic (NDJSON)",
+        "report": "/report - Generate PDF report",
+        "history": "/history - Get research history",
+        "docs": "/docs - API documentation"
+    }
+})
+_HEALTH_PAYLOAD_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "service": settings.APP_NAME
+})[:-1] + b',"timestamp":"'
 
 
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": f"Welcome to {settings.APP_NAME}",
-        "version": settings.APP_VERSION,
-        "endpoints": {
-            "research": "/research - Conduct research on a topic",
-            "report": "/report - Generate PDF report",
-            "history": "/history - Get research history",
-            "docs": "/docs - API documentation"
-        }
-    }
+    return Response(content=_ROOT_PAYLOAD, media_type="application/json")
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(now: datetime = Depends(request_clock)):
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "service": settings.APP_NAME
-    }
+    return Response(
+        content=_HEALTH_PAYLOAD_PREFIX + now.isoformat().encode() + b'"}',
+        media_type="application/json"
+    )
 
 
-@app.post("/research", response_model=ResearchResponse)
-async def conduct_research(
-    request: ResearchRequest,
-    background_tasks: BackgroundTasks
-):
+async def _run_research_pipeline(research_id: str, request: ResearchRequest, created_at: datetime, cache_key: str):
     """
-    Conduct research on a given topic
+    Run the research pipeline for a submitted research job
     
-    This endpoint:
-    1. Performs web search using Tavily
-    2. Analyzes content using Google Gemini AI
-    3. Stores results in vector database
-    4. Returns structured research data
+    Executed as a background task after /research has returned. Updates the
+    stored research entry to COMPLETED or FAILED when done.
     """
     try:
-        # Generate unique research ID
-        research_id = f"res_{uuid.uuid4().hex[:12]}"
-        
-        logger.info(f"[RESEARCH] Starting research: {research_id} - Topic: '{request.topic}' (max_results: {request.max_results})")
+        logger.info("[RESEARCH] Starting research: %s - Topic: '%s' (max_results: %s)", research_id, request.topic, request.max_results)
         start_time = datetime.now()
         
         # Step 1: Web search
-        logger.info(f"  [1/3] Searching web (max {request.max_results} results)...")
+        logger.info("  [1/3] Searching web (max %s results)...", request.max_results)
         search_results = await search_service.search(
             query=request.topic,
             max_results=request.max_results
         )
-        logger.info(f"  [OK] Found {len(search_results)} results")
+        logger.info("  [OK] Found %s results", len(search_results))
         
-        # Get context from search results
-        context = await search_service.get_context(
-            query=request.topic,
-            max_results=request.max_results
-        )
-        logger.info(f"  [OK] Context extracted: {len(context)} chars")
+        # Build context from the same results (no second Tavily call)
+        context = search_service.build_context(search_results)
+        logger.info("  [OK] Context extracted: %s chars", len(context))
         
         # Step 2: AI analysis
-        logger.info(f"  [2/3] Analyzing with AI (model: {settings.GEMINI_MODEL})...")
+        logger.info("  [2/3] Analyzing with AI (model: %s)...", agent.depth_models.get(request.depth, settings.GEMINI_MODEL))
         analysis = await agent.analyze_topic(
             topic=request.topic,
-            context=context
+            context=context,
+            depth=request.depth
         )
-        logger.info(f"  [OK] Analysis complete (confidence: {analysis.get('confidence_score', 'N/A')})")
+        logger.info("  [OK] Analysis complete (%s key findings)", len(analysis.get('key_findings', [])))
         
         # Extract sources
         sources = [result.url for result in search_results]
         
         # Prepare research data
+        finished_at = datetime.now()
         research_data = {
             "research_id": research_id,
             "topic": request.topic,
@@ -183,35 +315,157 @@ async def conduct_research(
             "detailed_analysis": analysis.get("detailed_analysis", ""),
             "sources": sources,
             "raw_content": context,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": created_at.isoformat(),
+            "updated_at": finished_at.isoformat()
         }
         
         # Step 3: Store in vector database
-        logger.info(f"  [3/3] Storing in ChromaDB (ID: {research_id})...")
+        logger.info("  [3/3] Storing in ChromaDB (ID: %s)...", research_id)
         await vector_store.store_research(research_id, research_data)
+        _invalidate_history_cache()
         
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[SUCCESS] Research completed successfully: {research_id} (duration: {duration:.2f}s)")
+        duration = (finished_at - start_time).total_seconds()
+        logger.info("[SUCCESS] Research completed successfully: %s (duration: %.2fs)", research_id, duration)
         
-        # Return response
-        return ResearchResponse(
+    except Exception as e:
+        logger.error("[ERROR] Research failed for topic '%s': %s", request.topic, e, exc_info=True)
+        
+        # Don't serve failed research from cache
+        if _research_cache.get(cache_key) == research_id:
+            _research_cache.delete(cache_key)
+        
+        try:
+            await vector_store.store_research(research_id, {
+                "research_id": research_id,
+                "topic": request.topic,
+                "status": ResearchStatus.FAILED,
+                "summary": f"Research failed: {str(e)}",
+                "created_at": created_at.isoformat(),
+                "updated_at": datetime.now().isoformat()
+            })
+            _invalidate_history_cache()
+        except Exception as store_error:
+            logger.error("[ERROR] Failed to record failure for %s: %s", research_id, store_error)
+
+
+@app.post("/research", response_model=ResearchResponse)
+async def conduct_research(
+    request: ResearchRequest,
+    background_tasks: BackgroundTasks,
+    now: datetime = Depends(request_clock)
+):
+    """
+    Submit research on a given topic
+    
+    This endpoint:
+    1. Registers a PENDING research entry
+    2. Schedules the stub write, web search, AI analysis and storage as background tasks
+    3. Returns the research ID immediately
+    
+    Poll GET /research/{research_id} until the status is completed or failed.
+    """
+    try:
+        # Return recent research on the same topic instead of re-running the pipeline
+        cache_key = _research_cache_key(request)
+        cached_id = _research_cache.get(cache_key)
+        if cached_id:
+            cached = await _get_research(cached_id)
+            if cached:
+                logger.info("[RESEARCH] Cache hit for topic '%s': %s", request.topic, cached_id)
+                metadata = cached['metadata']
+                document = parse_document(cached['document'])
+                return _json_response(RESEARCH_RESPONSE_ADAPTER, ResearchResponse(
+                    research_id=cached_id,
+                    topic=metadata.get('topic', request.topic),
+                    status=metadata.get('status', ResearchStatus.COMPLETED),
+                    summary=_extract_summary(cached) or None,
+                    key_findings=document.get('key_findings'),
+                    sources=document.get('sources'),
+                    created_at=metadata.get('created_at') or now
+                ))
+        
+        # Generate unique research ID
+        research_id = f"res_{secrets.token_hex(6)}"
+        created_at = now
+        
+        logger.info("[RESEARCH] Research submitted: %s - Topic: '%s'", research_id, request.topic)
+        
+        # Stub is served from memory until the background write to ChromaDB lands
+        stub = {
+            "research_id": research_id,
+            "topic": request.topic,
+            "status": ResearchStatus.PENDING,
+            "created_at": created_at.isoformat(),
+            "updated_at": created_at.isoformat()
+        }
+        _pending_research[research_id] = {
+            "research_id": research_id,
+            "document": "",
+            "metadata": {
+                "research_id": research_id,
+                "topic": request.topic,
+                "created_at": stub["created_at"],
+                "status": ResearchStatus.PENDING.value,
+                "summary": ""
+            }
+        }
+        
+        _research_cache.set(cache_key, research_id)
+        # Background tasks run in order, so the stub is written before the pipeline result
+        background_tasks.add_task(_persist_research_stub, research_id, stub)
+        background_tasks.add_task(_run_research_pipeline, research_id, request, created_at, cache_key)
+        
+        return _json_response(RESEARCH_RESPONSE_ADAPTER, ResearchResponse(
             research_id=research_id,
             topic=request.topic,
-            status=ResearchStatus.COMPLETED,
-            summary=analysis.get("summary"),
-            key_findings=analysis.get("key_findings"),
-            sources=sources,
-            created_at=datetime.now()
-        )
+            status=ResearchStatus.PENDING,
+            created_at=created_at
+        ))
         
     except Exception as e:
-        logger.error(f"[ERROR] Research failed for topic '{request.topic}': {str(e)}", exc_info=True)
+        logger.error("[ERROR] Research submission failed for topic '%s': %s", request.topic, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
 
 
+@app.post("/research/stream")
+async def stream_research(request: ResearchRequest):
+    """
+    Run web search and AI analysis, streaming the analysis as it is generated
+    
+    The response is newline-delimited JSON: one line per partial analysis
+    (fields fill in as Gemini writes them), then the final analysis. A failure
+    after streaming has started is sent as a final {"error": ...} line. The
+    result is not stored; use POST /research for persisted research.
+    """
+    logger.info("[STREAM] Streaming analysis for topic '%s'", request.topic)
+    try:
+        search_results = await search_service.search(
+            query=request.topic,
+            max_results=request.max_results
+        )
+    except Exception as e:
+        logger.error("[ERROR] Stream search failed for topic '%s': %s", request.topic, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
+    
+    context = search_service.build_context(search_results)
+    
+    async def analysis_lines():
+        try:
+            async with aclosing(agent.analyze_topic_stream(request.topic, context=context, depth=request.depth)) as analyses:
+                async for analysis in analyses:
+                    yield orjson.dumps(analysis) + b"\n"
+        except Exception as e:
+            logger.error("[ERROR] Stream analysis failed for topic '%s': %s", request.topic, e, exc_info=True)
+            yield orjson.dumps({"error": f"Research failed: {str(e)}"}) + b"\n"
+    
+    # On client disconnect Starlette abandons the iterator mid-yield; closing it
+    # afterwards releases the Gemini semaphore permit held by the stream
+    lines = analysis_lines()
+    return StreamingResponse(lines, media_type="application/x-ndjson", background=BackgroundTask(lines.aclose))
+
+
 @app.post("/report", response_model=ReportResponse)
-async def generate_report(request: ReportRequest):
+async def generate_report(request: ReportRequest, now: datetime = Depends(request_clock)):
     """
     Generate PDF report from research data
     
@@ -219,37 +473,46 @@ async def generate_report(request: ReportRequest):
     1. Retrieves research data from vector store
     2. Generates structured PDF report
     3. Returns download URL
+    
+    Returns 409 while the research is pending or in progress, or if it failed.
     """
     try:
-        logger.info(f"[REPORT] Generating report for research: {request.research_id}")
-        start_time = datetime.now()
-        
+        logger.info("[REPORT] Generating report for research: %s", request.research_id)
         # Retrieve research data
-        logger.info(f"  Retrieving research data from ChromaDB...")
-        research_data = await vector_store.get_research(request.research_id)
+        logger.info("  Retrieving research data from ChromaDB...")
+        research_data = await _get_research(request.research_id)
         
         if not research_data:
-            logger.warning(f"  [WARNING] Research not found: {request.research_id}")
+            logger.warning("  [WARNING] Research not found: %s", request.research_id)
             raise HTTPException(
                 status_code=404,
                 detail=f"Research not found: {request.research_id}"
             )
         
-        logger.info(f"  [OK] Research data retrieved")
+        status = research_data['metadata'].get('status', ResearchStatus.COMPLETED.value)
+        if status != ResearchStatus.COMPLETED.value:
+            logger.warning("  [WARNING] Research %s is not completed (status: %s)", request.research_id, status)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Research is not completed (status: {status})"
+            )
+        
+        logger.info("  [OK] Research data retrieved")
+        document = parse_document(research_data['document'])
         
         # Generate report ID
-        report_id = f"rpt_{uuid.uuid4().hex[:12]}"
+        report_id = f"rpt_{secrets.token_hex(6)}"
         
         # Generate PDF
-        logger.info(f"  Generating PDF with ReportLab (ID: {report_id})...")
+        logger.info("  Generating PDF with ReportLab (ID: %s)...", report_id)
         pdf_path = await pdf_generator.generate_report(
             research_data={
                 **research_data['metadata'],
                 "research_id": research_data['research_id'],
-                "summary": research_data['document'].split('Summary: ')[1].split('\n\n')[0] if 'Summary: ' in research_data['document'] else "",
-                "key_findings": research_data['metadata'].get('key_findings', []),
-                "detailed_analysis": research_data['metadata'].get('detailed_analysis', ''),
-                "sources": research_data['metadata'].get('sources', [])
+                "summary": _extract_summary(research_data),
+                "key_findings": document.get('key_findings', []),
+                "detailed_analysis": document.get('detailed_analysis', ''),
+                "sources": document.get('sources', [])
             },
             report_id=report_id,
             include_sources=request.include_sources
@@ -259,38 +522,46 @@ async def generate_report(request: ReportRequest):
         filename = os.path.basename(pdf_path)
         download_url = f"/download/{filename}"
         
-        duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[SUCCESS] Report generated successfully: {report_id} ({filename}) (duration: {duration:.2f}s)")
+        duration = (datetime.now() - now).total_seconds()
+        logger.info("[SUCCESS] Report generated successfully: %s (%s) (duration: %.2fs)", report_id, filename, duration)
         
-        return ReportResponse(
+        return _json_response(REPORT_RESPONSE_ADAPTER, ReportResponse(
             report_id=report_id,
             research_id=request.research_id,
             file_path=pdf_path,
             download_url=download_url,
-            created_at=datetime.now()
-        )
+            created_at=now
+        ))
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"[ERROR] Report generation failed for {request.research_id}: {str(e)}", exc_info=True)
+        logger.error("[ERROR] Report generation failed for %s: %s", request.research_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
 
 @app.get("/history")
-async def get_research_history(limit: int = 10):
+async def get_research_history(response: Response, limit: int = 10):
     """
     Get research history
     
-    Returns list of recent research with metadata
+    Returns list of recent research with metadata. Results are cached
+    briefly and invalidated whenever research is stored.
     """
     try:
-        logger.info(f"[HISTORY] Retrieving research history (limit: {limit})")
+        logger.info("[HISTORY] Retrieving research history (limit: %s)", limit)
         
-        history = await vector_store.get_all_research(limit=limit)
+        async with _history_cache_lock:
+            entry = _history_cache.get(limit)
+            if entry and time.monotonic() - entry[1] < HISTORY_CACHE_TTL:
+                history = entry[0]
+            else:
+                history = await vector_store.get_all_research(limit=limit)
+                _history_cache[limit] = (history, time.monotonic())
         
-        logger.info(f"[SUCCESS] Retrieved {len(history)} research items")
+        logger.info("[SUCCESS] Retrieved %s research items", len(history))
         
+        response.headers["Cache-Control"] = f"public, max-age={HISTORY_CACHE_TTL}"
         return {
             "count": len(history),
             "limit": limit,
@@ -298,61 +569,83 @@ async def get_research_history(limit: int = 10):
         }
         
     except Exception as e:
-        logger.error(f"[ERROR] Failed to retrieve history: {str(e)}", exc_info=True)
+        logger.error("[ERROR] Failed to retrieve history: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve history: {str(e)}")
 
 
 @app.get("/research/{research_id}")
 async def get_research_details(research_id: str):
-    """Get detailed information about specific research"""
+    """
+    Get detailed information about specific research
+    
+    Besides the stored entry, the response carries the research status and
+    the parsed result fields (empty until the status is completed). Clients
+    poll this endpoint after submitting research.
+    """
     try:
-        logger.info(f"[DETAILS] Retrieving research details for: {research_id}")
+        logger.info("[DETAILS] Retrieving research details for: %s", research_id)
         
-        research_data = await vector_store.get_research(research_id)
+        research_data = await _get_research(research_id)
         
         if not research_data:
-            logger.warning(f"  [WARNING] Research not found: {research_id}")
+            logger.warning("  [WARNING] Research not found: %s", research_id)
             raise HTTPException(
                 status_code=404,
                 detail=f"Research not found: {research_id}"
             )
         
-        logger.info(f"[SUCCESS] Research details retrieved: {research_id}")
+        logger.info("[SUCCESS] Research details retrieved: %s", research_id)
         
-        return research_data
+        document = parse_document(research_data['document'])
+        return {
+            **research_data,
+            "status": research_data['metadata'].get('status', ResearchStatus.COMPLETED.value),
+            "summary": _extract_summary(research_data),
+            "key_findings": document.get('key_findings', []),
+            "detailed_analysis": document.get('detailed_analysis', {}),
+            "sources": document.get('sources', [])
+        }
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"[ERROR] Failed to retrieve research {research_id}: {str(e)}", exc_info=True)
+        logger.error("[ERROR] Failed to retrieve research %s: %s", research_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve research: {str(e)}")
 
 
-@app.get("/download/{filename}")
+@app.get("/download/{filename:path}")
 async def download_report(filename: str):
     """Download generated PDF report"""
+    if not _SAFE_FILENAME.match(filename) or filename.startswith('.'):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    
     try:
-        logger.info(f"[DOWNLOAD] Download requested: {filename}")
+        logger.info("[DOWNLOAD] Download requested: %s", filename)
         
         file_path = os.path.join(settings.REPORTS_PATH, filename)
         
-        if not os.path.exists(file_path):
-            logger.warning(f"  [WARNING] File not found: {filename}")
+        # Single stat call, reused by FileResponse
+        try:
+            stat_result = await asyncio.to_thread(os.stat, file_path)
+        except FileNotFoundError:
+            logger.warning("  [WARNING] File not found: %s", filename)
             raise HTTPException(status_code=404, detail="Report not found")
         
-        file_size = os.path.getsize(file_path)
-        logger.info(f"[SUCCESS] Serving file: {filename} ({file_size} bytes)")
+        logger.info("[SUCCESS] Serving file: %s (%s bytes)", filename, stat_result.st_size)
         
+        # Reports are never rewritten once generated
         return FileResponse(
             path=file_path,
             media_type="application/pdf",
-            filename=filename
+            filename=filename,
+            stat_result=stat_result,
+            headers={"Cache-Control": "public, max-age=3600, immutable"}
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"[ERROR] Download failed for {filename}: {str(e)}", exc_info=True)
+        logger.error("[ERROR] Download failed for %s: %s", filename, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
 
 
@@ -360,11 +653,11 @@ async def download_report(filename: str):
 async def search_research(query: str, limit: int = 5):
     """Search for similar research by query"""
     try:
-        logger.info(f"[SEARCH] Searching similar research: '{query}' (limit: {limit})")
+        logger.info("[SEARCH] Searching similar research: '%s' (limit: %s)", query, limit)
         
         results = await vector_store.search_similar(query, n_results=limit)
         
-        logger.info(f"[SUCCESS] Found {len(results)} similar research items")
+        logger.info("[SUCCESS] Found %s similar research items", len(results))
         
         return {
             "query": query,
@@ -373,15 +666,20 @@ async def search_research(query: str, limit: int = 5):
         }
         
     except Exception as e:
-        logger.error(f"[ERROR] Search failed for query '{query}': {str(e)}", exc_info=True)
+        logger.error("[ERROR] Search failed for query '%s': %s", query, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
+    # Reload mode only supports a single worker
     uvicorn.run(
         "backend.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.WORKERS,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools"
     )
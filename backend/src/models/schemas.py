@@ -19,6 +19,8 @@ class ResearchRequest(BaseModel):
     max_results: Optional[int] = Field(default=10, description="Max search results", ge=1, le=20)
     
     model_config = {
+        "extra": "ignore",
+        "frozen": True,
         "json_schema_extra": {
             "examples": [
                 {
@@ -42,6 +44,8 @@ class ResearchResponse(BaseModel):
     created_at: datetime = Field(..., description="Creation timestamp")
     
     model_config = {
+        "extra": "ignore",
+        "frozen": True,
         "json_schema_extra": {
             "examples": [
                 {
@@ -65,6 +69,8 @@ class ReportRequest(BaseModel):
     include_sources: Optional[bool] = Field(default=True, description="Include sources in report")
     
     model_config = {
+        "extra": "ignore",
+        "frozen": True,
         "json_schema_extra": {
             "examples": [
                 {
@@ -84,6 +90,11 @@ class ReportResponse(BaseModel):
     file_path: str = Field(..., description="Path to generated report")
     download_url: str = Field(..., description="Download URL")
     created_at: datetime = Field(..., description="Creation timestamp")
+    
+    model_config = {
+        "extra": "ignore",
+        "frozen": True
+    }
 
 
 class SearchResult(BaseModel):
@@ -92,6 +103,11 @@ class SearchResult(BaseModel):
     url: str
     snippet: str
     relevance_score: Optional[float] = None
+    
+    model_config = {
+        "extra": "ignore",
+        "frozen": True
+    }
 
 
 class ResearchData(BaseModel):
@@ -106,3 +122,37 @@ class ResearchData(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
+    
+    model_config = {
+        "extra": "ignore",
+        "frozen": True
+    }
+
+
+class DetailedAnalysis(BaseModel):
+    """Sections of the detailed analysis returned by the AI agent"""
+    executive_overview: str
+    market_analysis: str
+    strategic_insights: str
+    risk_assessment: str
+    implementation_roadmap: str
+    financial_implications: str
+    future_outlook: str
+    competitive_intelligence: str
+    
+    model_config = {
+        "extra": "ignore",
+        "frozen": True
+    }
+
+
+class AnalysisResult(BaseModel):
+    """Structured analysis returned by the AI agent (also used as Gemini response schema)"""
+    summary: str
+    key_findings: List[str]
+    detailed_analysis: DetailedAnalysis
+    
+    model_config = {
+        "extra": "ignore",
+        "frozen": True
+    }
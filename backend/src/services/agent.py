@@ -1,49 +1,47 @@
-import os
-import json
+import re
+import time
+import orjson
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, List
+from contextlib import aclosing
+from typing import Any, Optional, Dict, List, Union, AsyncIterator
+import numpy as np
 import google.generativeai as genai
+from pydantic import ValidationError
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 from config.settings import settings
+from backend.src.utils.cache import SingleFlight, TTLCache
+from backend.src.utils.embeddings import embed
+from backend.src.models.schemas import AnalysisResult
+from backend.src.services.vector_store import vector_store, parse_document
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Transient Gemini errors worth retrying (rate limits, server errors, timeouts)
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
 
-class AIAgent:
-    """AI Agent using Google Gemini API for research and analysis"""
-    
-    def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        logger.info(f"AIAgent initialized with model: {settings.GEMINI_MODEL}")
-    
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True
-    )
-    async def analyze_topic(self, topic: str, context: Optional[str] = None, depth: int = 3) -> Dict:
-        """
-        Analyze research topic and generate structured analysis with retry logic
-        
-        Args:
-            topic: Research topic
-            context: Additional context from web search
-            depth: Analysis depth (1-5, higher = more detailed)
-            
-        Returns:
-            dict with summary, key_findings, detailed_analysis, and metadata
-        """
-        try:
-            logger.info(f"Starting analysis for topic: {topic[:50]}...")
-            
-            # Adjust prompt based on depth
-            depth_instructions = self._get_depth_instructions(depth)
-            
-            system_prompt = f"""# ROLE & EXPERTISE
+# Retry policy for transient Gemini failures (jittered exponential backoff)
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(min=1, max=20),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    reraise=True
+)
+
+# Static analysis instructions, sent as the model system instruction so the
+# identical prefix can be reused by Gemini context caching across requests
+ANALYSIS_SYSTEM_PROMPT = """# ROLE & EXPERTISE
 You are Dr. Alexandra Chen, Chief Strategy Officer at McKinsey & Company with 20+ years leading Fortune 500 transformations. PhD in Economics (MIT), former Goldman Sachs Managing Director, advisor to 3 unicorn startups. Your reports have guided $50B+ in strategic decisions.
 
 # CONTEXT
@@ -66,13 +64,13 @@ Produce a comprehensive strategic analysis that:
 
 # CONSTRAINTS
 - Output: STRICT JSON only (no markdown, no code blocks)
-- Length: Comprehensive yet concise (board attention span)
+- Length: Set by the DEPTH section of each request; the paragraph and finding counts below are the maximum, used at the deepest level
 - Tone: Executive-level (authoritative, data-driven, actionable)
 - Quality: McKinsey Quarterly publication standard
 - Accuracy: Every claim must be defensible with sources
 
 # OUTPUT FORMAT (STRICT JSON)
-{{
+{
   "summary": "4-6 paragraph executive brief covering: (1) Strategic overview and market context, (2) Core value proposition and competitive positioning, (3) Critical risks and opportunities with probability assessment, (4) Key recommendations with expected ROI and timeline",
   "key_findings": [
     "Finding 1: Market size and growth trajectory with TAM/SAM/SOM breakdown",
@@ -84,7 +82,7 @@ Produce a comprehensive strategic analysis that:
     "Finding 7: Supply chain and operational considerations",
     "Finding 8: Strategic partnerships and ecosystem dependencies"
   ],
-  "detailed_analysis": {{
+  "detailed_analysis": {
     "executive_overview": "Set strategic context in 3-4 paragraphs: macro trends, market structure, key players, regulatory environment, and why this matters now",
     "market_analysis": "Deep dive in 4-5 paragraphs: market sizing (TAM/SAM/SOM), growth drivers, adoption curves, pricing dynamics, customer segments, distribution channels",
     "strategic_insights": "Core findings in 4-5 paragraphs: competitive positioning, differentiation opportunities, value chain analysis, strategic partnerships, M&A landscape",
@@ -93,12 +91,8 @@ Produce a comprehensive strategic analysis that:
     "financial_implications": "Economic analysis in 2-3 paragraphs: investment requirements, cost structure, revenue model, break-even analysis, IRR projections, sensitivity analysis",
     "future_outlook": "Predictive analysis in 4-5 paragraphs: 3-year trend forecast, emerging technologies, disruption scenarios (bull/base/bear cases), strategic pivots, global implications",
     "competitive_intelligence": "Competitive landscape in 3-4 paragraphs: key player profiles, market positioning matrix, SWOT analysis, strategic moves, threats and opportunities"
-  }},
-  "confidence_score": 0.95,
-  "sources_used": 10
-}}
-
-{depth_instructions}
+  }
+}
 
 # QUALITY STANDARDS
 ✓ Every paragraph must provide actionable insights
@@ -115,117 +109,693 @@ Produce a comprehensive strategic analysis that:
 ⚠ No line breaks within string values
 ⚠ Keep each paragraph as single continuous text
 ⚠ Test JSON validity before output"""
-            
-            # Increase context limit for ultra-detailed reports
-            max_context_length = 15000  # Increased from 6000 for world-class analysis
-            if context and len(context) > max_context_length:
-                logger.warning(f"Context truncated from {len(context)} to {max_context_length} chars")
-                context = context[:max_context_length] + "\n\n[Context truncated for length...]"
-            
-            user_prompt = f"""Research Topic: {topic}
 
-Web Search Context:
-{context if context else 'No additional context provided.'}
+# Analysis instructions per depth level (1-5)
+DEPTH_INSTRUCTIONS = {
+    1: (
+        "Provide a brief, high-level overview. Length: a 3-sentence summary, "
+        "3 key findings, and 1 sentence per detailed_analysis section."
+    ),
+    2: (
+        "Provide a moderate analysis with main points. Length: a 1-paragraph summary, "
+        "4 key findings, and 1-2 sentences per detailed_analysis section."
+    ),
+    3: (
+        "Provide a detailed analysis with comprehensive insights. Length: a 2-paragraph summary, "
+        "5 key findings, and 2-3 sentences per detailed_analysis section."
+    ),
+    4: (
+        "Provide an in-depth analysis with extensive details. Length: a 4-paragraph summary, "
+        "8 key findings, and 2-3 paragraphs per detailed_analysis section."
+    ),
+    5: (
+        "Provide an exhaustive, expert-level analysis. Length: the full counts given in the "
+        "output format (4-6 paragraph summary, 8 key findings, all paragraphs per section)."
+    )
+}
+
+# Static head of the analysis prompt per depth; only topic and context are spliced in per call
+ANALYSIS_PROMPT_HEADERS = {
+    depth: f"# DEPTH\n{instructions}\n\nResearch Topic: "
+    for depth, instructions in DEPTH_INSTRUCTIONS.items()
+}
+ANALYSIS_PROMPT_FOOTER = "\n\nProvide a comprehensive analysis following the JSON structure specified."
+
+# Output token cap per depth level so shallow analyses don't pay for long decodes;
+# DEPTH_INSTRUCTIONS keep the requested length inside each cap. Gemini 2.5
+# thinking tokens also count toward the cap and google-generativeai 0.8 cannot
+# limit them, so a response cut short goes through the partial-JSON recovery.
+DEPTH_MAX_OUTPUT_TOKENS = {1: 800, 2: 1200, 3: 1500, 4: 5000, 5: 6000}
+
+# Separator WebSearchService.build_context places between sources
+CONTEXT_SEPARATOR = "\n---\n"
+
+# Leading part of the context embedded for semantic cache context checks
+CONTEXT_EMBEDDING_CHARS = 2000
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate token count locally (avoids a count_tokens round trip)
+    
+    ASCII text averages CHARS_PER_TOKEN characters per token; non-ASCII
+    characters (CJK, accented letters, symbols) are counted as a token each.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // CHARS_PER_TOKEN + (len(text) - ascii_chars) + 1
+
+
+def token_overlap(first: str, second: str) -> float:
+    """Jaccard overlap of lowercased word sets (lexical guard for semantic cache hits)"""
+    first_tokens = set(re.findall(r"\w+", first.lower()))
+    second_tokens = set(re.findall(r"\w+", second.lower()))
+    if not first_tokens or not second_tokens:
+        return 0.0
+    return len(first_tokens & second_tokens) / len(first_tokens | second_tokens)
+
+
+# Length of a complete \uXXXX escape sequence
+_UNICODE_ESCAPE_LEN = 6
+
+# \uXXXX escape of a UTF-16 high surrogate (first half of a pair)
+_HIGH_SURROGATE_RE = re.compile(r'\\u[dD][89abAB]')
+
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """
+    Parse the prefix of a JSON document that is still being streamed
+    
+    Walks the text tracking open containers, string and escape state, then
+    closes the open containers after the last complete value and parses the
+    result with orjson. A string value still being written is included as a
+    partial string (minus any escape sequence cut in half), so fields only
+    ever grow and keep their type between calls; keys without a started
+    value are left out. Streaming callers re-run it on the whole buffer for
+    each chunk, so the cost per call is linear in the text received so far.
+    
+    Args:
+        text: JSON text received so far
+        
+    Returns:
+        Parsed partial value, or None if nothing parseable has arrived yet
+    """
+    stack: List[str] = []
+    expect_key = False
+    in_string = False
+    string_is_key = False
+    escaped = False
+    escape_start = 0
+    unicode_start = -1
+    safe_end = 0
+    safe_closers = ""
+    
+    def closers() -> str:
+        return "".join("}" if container == "{" else "]" for container in reversed(stack))
+    
+    for idx, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+                if char == "u":
+                    unicode_start = escape_start
+            elif char == "\\":
+                escaped = True
+                escape_start = idx
+            elif char == '"':
+                in_string = False
+                if not string_is_key:
+                    safe_end, safe_closers = idx + 1, closers()
+            continue
+        
+        if char == '"':
+            in_string = True
+            string_is_key = expect_key
+        elif char in "{[":
+            stack.append(char)
+            expect_key = char == "{"
+            safe_end, safe_closers = idx + 1, closers()
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            expect_key = False
+            safe_end, safe_closers = idx + 1, closers()
+        elif char == ":":
+            expect_key = False
+        elif char == ",":
+            # The value before the comma is complete
+            safe_end, safe_closers = idx, closers()
+            expect_key = bool(stack) and stack[-1] == "{"
+    
+    # Include a string value that is still being written, dropping a trailing
+    # escape that is not complete yet: a lone "\", "\u" with under 4 hex digits,
+    # or a high surrogate still waiting for its low half
+    if in_string and not string_is_key:
+        string_end = len(text)
+        if escaped:
+            string_end = escape_start
+        elif unicode_start >= 0 and (
+            len(text) - unicode_start < _UNICODE_ESCAPE_LEN
+            or (len(text) - unicode_start == _UNICODE_ESCAPE_LEN and _HIGH_SURROGATE_RE.match(text, unicode_start))
+        ):
+            string_end = unicode_start
+        candidate = text[:string_end] + '"' + closers()
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            pass
+    
+    if not safe_end:
+        return None
+    
+    try:
+        return orjson.loads(text[:safe_end] + safe_closers)
+    except orjson.JSONDecodeError:
+        return None
 
-Provide a comprehensive analysis following the JSON structure specified."""
-            
-            logger.debug(f"Sending request to Gemini model: {settings.GEMINI_MODEL}")
-            
-            # Combine prompts for Gemini
-            full_prompt = f"""{system_prompt}
 
-{user_prompt}"""
+class AIAgent:
+    """AI Agent using Google Gemini API for research and analysis"""
+    
+    # Request options shared by every call (built once, not per request)
+    _SAFETY = {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+    _GEN_CFG_ANALYZE = {
+        depth: genai.GenerationConfig(
+            temperature=0.5,  # Reduced for more stable JSON
+            max_output_tokens=max_tokens,
+            response_mime_type="application/json",
+            response_schema=AnalysisResult
+        )
+        for depth, max_tokens in DEPTH_MAX_OUTPUT_TOKENS.items()
+    }
+    _GEN_CFG_STRUCTURE = genai.GenerationConfig(
+        temperature=0.5,
+        max_output_tokens=1500,
+        response_mime_type="application/json"
+    )
+    _GEN_CFG_REFINE = genai.GenerationConfig(
+        temperature=0.6,
+        max_output_tokens=1000
+    )
+    
+    def __init__(self):
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        
+        # Caps in-flight Gemini requests to stay under the provider rate limit
+        self._semaphore = asyncio.Semaphore(settings.GEMINI_CONCURRENCY)
+        
+        # Route analysis depth to model tier: light for overviews, pro for deep dives
+        self.depth_models = {
+            1: settings.GEMINI_MODEL_LIGHT,
+            2: settings.GEMINI_MODEL,
+            3: settings.GEMINI_MODEL,
+            4: settings.GEMINI_MODEL_PRO,
+            5: settings.GEMINI_MODEL_PRO
+        }
+        analysis_models = {
+            name: genai.GenerativeModel(name, system_instruction=ANALYSIS_SYSTEM_PROMPT)
+            for name in set(self.depth_models.values())
+        }
+        self.analysis_models = {
+            depth: analysis_models[name] for depth, name in self.depth_models.items()
+        }
+        
+        # Concurrent identical analyses await one shared call
+        self._inflight = SingleFlight()
+        
+        # Exact-match cache for deterministic structure/refine prompts
+        self._prompt_cache = TTLCache(
+            max_entries=settings.PROMPT_CACHE_MAX_ENTRIES,
+            ttl=settings.PROMPT_CACHE_TTL
+        )
+        
+        logger.info(f"AIAgent initialized with model: {settings.GEMINI_MODEL}")
+    
+    async def warm_up(self) -> None:
+        """
+        Open the Gemini connection ahead of the first request
+        
+        The SDK shares one async client (and its keep-alive channel) across all
+        calls; a free count_tokens call establishes the connection and TLS
+        session at startup instead of on the first research job.
+        """
+        try:
+            await self.model.count_tokens_async("ping", request_options={"timeout": 10})
+            logger.info("Gemini connection warmed up")
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed: {str(e)}")
+    
+    async def analyze_topic(
+        self,
+        topic: str,
+        context: Optional[str] = None,
+        depth: int = 3,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """
+        Analyze research topic and generate structured analysis
+        
+        Concurrent calls with the same topic, context and depth share a
+        single in-flight analysis.
+        
+        Args:
+            topic: Research topic
+            context: Additional context from web search
+            depth: Analysis depth (1-5, higher = more detailed)
+            max_tokens: Output token cap (defaults to the cap for the depth)
             
-            # Generate response using Gemini with higher token limit for detailed reports
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.5,  # Reduced for more stable JSON
-                    max_output_tokens=6000,  # Reduced from 8000 for safety
-                    response_mime_type="application/json"
-                ),
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                }
-            )
+        Returns:
+            dict with summary, key_findings, detailed_analysis, and metadata
+        """
+        flight_key = hashlib.sha256(f"{depth}\n{max_tokens}\n{topic}\n{context or ''}".encode("utf-8")).hexdigest()
+        return await self._inflight.do(flight_key, lambda: self._analyze_topic(topic, context, depth, max_tokens))
+    
+    async def _analyze_topic(self, topic: str, context: Optional[str], depth: int, max_tokens: Optional[int]) -> Dict:
+        """Run a single analysis (cache lookup, Gemini call, parsing)"""
+        try:
+            logger.info(f"Starting analysis for topic: {topic[:50]}...")
+            response_text = ""
             
-            # Check if response was blocked
-            if not response.text or response.text.strip() == "":
-                logger.error(f"Empty response from Gemini. Finish reason: {response.candidates[0].finish_reason if response.candidates else 'Unknown'}")
-                raise Exception("AI returned empty response. Try reducing context length or simplifying the query.")
+            # Serve analysis of a semantically similar topic with equivalent context and same depth
+            topic_embedding = None
+            context_embedding = None
+            context_hash = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+            if settings.SEMANTIC_CACHE_ENABLED:
+                if context:
+                    topic_embedding, context_embedding = await asyncio.to_thread(
+                        self._embed, [topic, context[:CONTEXT_EMBEDDING_CHARS]]
+                    )
+                else:
+                    topic_embedding = await asyncio.to_thread(self._embed, topic)
+                cached = await self._lookup_cached_analysis(
+                    topic, topic_embedding, context_embedding, depth, max_tokens, context_hash
+                )
+                if cached is not None:
+                    logger.info(f"Semantic cache hit for topic: {topic[:50]}...")
+                    return cached
+            
+            # Reuse a closely matching completed research as prior analysis
+            prior = await self._find_prior_research(topic)
+            if prior is not None:
+                logger.info(f"Using prior research {prior['research_id']} as context (distance: {prior['distance']:.3f})")
+                prior_document = parse_document(prior["document"])
+                prior_analysis = (
+                    f"Topic: {prior_document.get('topic', '')}\n"
+                    f"Summary: {prior_document.get('summary', '')}\n"
+                    f"Key Findings: {'; '.join(prior_document.get('key_findings', []))}"
+                )
+                context = f"[Prior Analysis]\n{prior_analysis}{CONTEXT_SEPARATOR}{context or ''}"
             
-            # Clean and parse response
-            response_text = response.text.strip()
+            # Stream the response and collect it for parsing
+            response_text = await self._collect_analysis(topic, context, depth, max_tokens)
             
             # Try to fix common JSON issues
             if response_text.startswith('```json'):
                 response_text = response_text.replace('```json', '').replace('```', '').strip()
             
-            result = json.loads(response_text)
+            result = self._parse_analysis(response_text, topic, depth)
             
-            # Validate and enrich response
-            result = self._validate_and_enrich_analysis(result, topic)
+            # Truncated (recovered) analyses are not cached
+            if topic_embedding is not None and not result["metadata"].get("truncated"):
+                await self._cache_analysis(
+                    topic, topic_embedding, context_embedding, result, depth, max_tokens, context_hash
+                )
             
             logger.info(f"Analysis completed successfully for: {topic[:50]}...")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in AI response: {str(e)}")
-            logger.error(f"Response preview: {response.text[:500]}...")
-            
-            # Try alternative parsing - extract JSON from markdown code blocks
-            try:
-                import re
-                json_match = re.search(r'\{[\s\S]*\}', response.text)
-                if json_match:
-                    logger.info("Attempting to extract JSON from response...")
-                    result = json.loads(json_match.group(0))
-                    result = self._validate_and_enrich_analysis(result, topic)
-                    logger.info(f"Successfully recovered from JSON error for: {topic[:50]}...")
-                    return result
-            except:
-                pass
-            
-            raise Exception(f"AI returned invalid JSON: {str(e)}")
         except Exception as e:
             logger.error(f"AI analysis failed: {str(e)}")
             raise Exception(f"AI analysis failed: {str(e)}")
     
-    def _get_depth_instructions(self, depth: int) -> str:
-        """Get analysis instructions based on depth level"""
-        depth_map = {
-            1: "Provide a brief, high-level overview.",
-            2: "Provide a moderate analysis with main points.",
-            3: "Provide a detailed analysis with comprehensive insights.",
-            4: "Provide an in-depth analysis with extensive details.",
-            5: "Provide an exhaustive, expert-level analysis."
+    def _parse_analysis(self, response_text: str, topic: str, depth: int) -> Dict:
+        """
+        Validate analysis JSON against the schema and add metadata
+        
+        A response cut off at the token cap still carries its completed
+        fields; they are kept (single linear parse) as long as a summary
+        arrived, and the result is flagged metadata.truncated.
+        
+        Raises:
+            Exception: if the response is invalid and nothing usable was recovered
+        """
+        try:
+            result = AnalysisResult.model_validate_json(response_text).model_dump()
+            return self._validate_and_enrich_analysis(result, topic, depth)
+        except ValidationError as e:
+            logger.error(f"Invalid AI response: {str(e)}")
+            logger.error(f"Response preview: {response_text[:500]}...")
+            
+            recovered = parse_partial_json(response_text)
+            if not (isinstance(recovered, dict) and isinstance(recovered.get("summary"), str) and recovered["summary"]):
+                raise Exception(f"AI returned invalid JSON: {str(e)}")
+            
+            logger.warning(f"Recovered truncated analysis for: {topic[:50]}...")
+            result = self._validate_and_enrich_analysis(recovered, topic, depth)
+            result["metadata"]["truncated"] = True
+            return result
+    
+    async def analyze_topic_stream(
+        self,
+        topic: str,
+        context: Optional[str] = None,
+        depth: int = 3,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield progressively complete analysis dicts while Gemini streams
+        
+        Intermediate values are partial (e.g. summary is available before
+        detailed_analysis has finished); the last value is the validated,
+        enriched result as returned by analyze_topic.
+        
+        Args:
+            topic: Research topic
+            context: Additional context from web search
+            depth: Analysis depth (1-5, higher = more detailed)
+            max_tokens: Output token cap (defaults to the cap for the depth)
+            
+        Yields:
+            Partial analysis dicts, then the final analysis
+        """
+        response_text = ""
+        last_partial = None
+        
+        # Close the Gemini stream (and release its semaphore permit) as soon as
+        # this generator is closed, not when it is garbage-collected
+        async with aclosing(self.stream_analysis(topic, context, depth, max_tokens)) as chunks:
+            async for chunk in chunks:
+                response_text += chunk
+                partial = parse_partial_json(response_text)
+                if isinstance(partial, dict) and partial != last_partial:
+                    last_partial = partial
+                    yield partial
+        
+        yield self._parse_analysis(response_text.strip(), topic, depth)
+    
+    @retry_transient
+    async def _collect_analysis(self, topic: str, context: Optional[str], depth: int, max_tokens: Optional[int]) -> str:
+        """
+        Stream an analysis to completion and return the full text
+        
+        Transient errors usually surface while the stream is being read
+        (e.g. ServiceUnavailable mid-response), so the whole request is
+        retried, not just its setup.
+        """
+        chunks = [chunk async for chunk in self.stream_analysis(topic, context, depth, max_tokens, retry_setup=False)]
+        return "".join(chunks).strip()
+    
+    async def stream_analysis(
+        self,
+        topic: str,
+        context: Optional[str] = None,
+        depth: int = 3,
+        max_tokens: Optional[int] = None,
+        retry_setup: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Stream raw analysis JSON text from Gemini as it is generated
+        
+        Lets streaming consumers start processing before the full response
+        has been decoded; analyze_topic collects the chunks for parsing.
+        
+        Args:
+            topic: Research topic
+            context: Additional context from web search
+            depth: Analysis depth (1-5, higher = more detailed)
+            max_tokens: Output token cap (defaults to the cap for the depth)
+            retry_setup: Retry transient errors while opening the stream (errors
+                after chunks were yielded cannot be retried here)
+            
+        Yields:
+            Response text chunks in generation order
+        """
+        if context:
+            context = await asyncio.to_thread(self._select_context, topic, context)
+        
+        user_prompt = self._build_analysis_prompt(topic, context, depth)
+        model = self.analysis_models.get(depth, self.analysis_models[3])
+        
+        if max_tokens is None:
+            generation_config = self._GEN_CFG_ANALYZE.get(depth, self._GEN_CFG_ANALYZE[5])
+        else:
+            generation_config = genai.GenerationConfig(
+                temperature=0.5,
+                max_output_tokens=max_tokens,
+                response_mime_type="application/json",
+                response_schema=AnalysisResult
+            )
+        
+        logger.debug("Streaming request to Gemini model: %s", model.model_name)
+        
+        # Generate response using Gemini with higher token limit for detailed reports
+        request_options = {
+            "generation_config": generation_config,
+            "safety_settings": self._SAFETY,
+            "stream": True
         }
-        return depth_map.get(depth, depth_map[3])
+        async with self._semaphore:
+            if retry_setup:
+                response = await self._generate_content(model, user_prompt, **request_options)
+            else:
+                response = await model.generate_content_async(user_prompt, **request_options)
+            
+            received = False
+            async for chunk in response:
+                # Chunks without parts carry only finish/safety information
+                if chunk.parts and chunk.text:
+                    received = True
+                    yield chunk.text
+        
+        # Check if response was blocked
+        if not received:
+            logger.error(f"Empty response from Gemini. Finish reason: {response.candidates[0].finish_reason if response.candidates else 'Unknown'}")
+            raise Exception("AI returned empty response. Try reducing context length or simplifying the query.")
+    
+    @retry_transient
+    async def _generate_content(self, model: genai.GenerativeModel, prompt: str, **kwargs):
+        """
+        Send a request to Gemini, retrying only transient failures
+        
+        Parsing happens outside this boundary, so invalid JSON, blocked
+        responses and auth errors fail once instead of being re-billed.
+        """
+        return await model.generate_content_async(prompt, **kwargs)
+    
+    def _build_analysis_prompt(self, topic: str, context: Optional[str], depth: int) -> str:
+        """Build the per-request analysis prompt (system instruction is sent separately)"""
+        return "".join([
+            ANALYSIS_PROMPT_HEADERS.get(depth, ANALYSIS_PROMPT_HEADERS[3]),
+            topic,
+            "\n\nWeb Search Context:\n",
+            context or "No additional context provided.",
+            ANALYSIS_PROMPT_FOOTER
+        ])
     
-    def _validate_and_enrich_analysis(self, result: Dict, topic: str) -> Dict:
+    def _embed(self, text: Union[str, List[str]]) -> np.ndarray:
+        """Compute normalized sentence embedding(s) with the shared encoder"""
+        return embed(text)
+    
+    async def _find_prior_research(self, topic: str) -> Optional[Dict]:
+        """Find completed research on a closely matching topic (None if nothing is close enough)"""
+        try:
+            similar = await vector_store.search_similar(topic, n_results=1, where={"status": "completed"})
+        except Exception as e:
+            logger.warning(f"Prior research lookup failed: {str(e)}")
+            return None
+        
+        if similar and similar[0]["distance"] < settings.PRIOR_RESEARCH_MAX_DISTANCE:
+            return similar[0]
+        return None
+    
+    def _cache_filter(self, depth: int, max_tokens: Optional[int]) -> Dict:
+        """Build the metadata filter a cached analysis must match exactly"""
+        return {
+            "$and": [
+                {"depth": depth},
+                {"max_tokens": max_tokens or 0}
+            ]
+        }
+    
+    def _same_context(
+        self,
+        metadata: Dict,
+        context_hash: str,
+        context_embedding: Optional[np.ndarray]
+    ) -> bool:
+        """Check that a cached entry was produced from equivalent context"""
+        if metadata["context_hash"] == context_hash:
+            return True
+        if context_embedding is None or not metadata.get("context_embedding"):
+            return False
+        
+        cached_embedding = np.asarray(orjson.loads(metadata["context_embedding"]), dtype=np.float32)
+        return float(cached_embedding @ context_embedding) >= settings.SEMANTIC_CACHE_CONTEXT_THRESHOLD
+    
+    async def _lookup_cached_analysis(
+        self,
+        topic: str,
+        topic_embedding: np.ndarray,
+        context_embedding: Optional[np.ndarray],
+        depth: int,
+        max_tokens: Optional[int],
+        context_hash: str
+    ) -> Optional[Dict]:
+        """
+        Find a cached analysis of a semantically similar topic
+        
+        A hit needs cosine similarity above SEMANTIC_CACHE_THRESHOLD, an
+        unexpired entry and enough word overlap with the cached topic, so
+        near-identical embeddings of entity-differing topics don't collide.
+        The context must also match, either exactly or by embedding
+        similarity, so the same topic asked over different sources misses.
+        
+        Returns:
+            Cached analysis dict (metadata.topic set to the requested topic) or None
+        """
+        try:
+            candidates = await vector_store.query_analysis_cache(
+                topic_embedding.tolist(),
+                where=self._cache_filter(depth, max_tokens)
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        
+        now = time.time()
+        for candidate in candidates:
+            if candidate["similarity"] < settings.SEMANTIC_CACHE_THRESHOLD:
+                break
+            metadata = candidate["metadata"]
+            if now - metadata["ts"] > settings.SEMANTIC_CACHE_TTL:
+                continue
+            if token_overlap(topic, metadata["topic"]) < settings.SEMANTIC_CACHE_MIN_OVERLAP:
+                continue
+            if not self._same_context(metadata, context_hash, context_embedding):
+                continue
+            
+            # The entry was produced for a similar topic; report the requested one
+            result = orjson.loads(metadata["result_json"])
+            result["metadata"] = {
+                **result.get("metadata", {}),
+                "topic": topic,
+                "model_used": self.depth_models.get(depth, settings.GEMINI_MODEL),
+                "cached_topic": metadata["topic"]
+            }
+            return result
+        
+        return None
+    
+    async def _cache_analysis(
+        self,
+        topic: str,
+        topic_embedding: np.ndarray,
+        context_embedding: Optional[np.ndarray],
+        result: Dict,
+        depth: int,
+        max_tokens: Optional[int],
+        context_hash: str
+    ) -> None:
+        """Store an analysis in the semantic cache (failures are logged, not raised)"""
+        cache_id = hashlib.sha256(
+            f"{depth}\n{max_tokens}\n{context_hash}\n{topic.strip().lower()}".encode("utf-8")
+        ).hexdigest()
+        
+        try:
+            await vector_store.add_cached_analysis(
+                cache_id,
+                topic_embedding.tolist(),
+                topic,
+                {
+                    "topic": topic,
+                    "depth": depth,
+                    "max_tokens": max_tokens or 0,
+                    "context_hash": context_hash,
+                    "context_embedding": (
+                        orjson.dumps(context_embedding, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+                        if context_embedding is not None else ""
+                    ),
+                    "result_json": orjson.dumps(result).decode("utf-8"),
+                    "ts": time.time()
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache analysis: {str(e)}")
+    
+    def _select_context(self, topic: str, context: str) -> str:
+        """
+        Fit context into the token budget, keeping the passages most relevant to the topic
+        
+        Args:
+            topic: Research topic
+            context: Combined search context
+            
+        Returns:
+            Context with the best-matching passages in their original order
+        """
+        budget = settings.CONTEXT_TOKEN_BUDGET
+        total_tokens = estimate_tokens(context)
+        if total_tokens <= budget:
+            return context
+        
+        passages = [passage for passage in context.split(CONTEXT_SEPARATOR) if passage.strip()]
+        embeddings = self._embed([topic] + passages)
+        scores = embeddings[1:] @ embeddings[0]
+        
+        # Greedily take passages by relevance while they fit the budget
+        selected = []
+        used = 0
+        for idx in np.argsort(scores)[::-1]:
+            cost = estimate_tokens(passages[idx])
+            if used + cost <= budget:
+                selected.append(idx)
+                used += cost
+        
+        if not selected:
+            # Even the best passage is too long; keep its leading part
+            best = passages[int(np.argmax(scores))]
+            selected_context = best[:budget * CHARS_PER_TOKEN]
+        else:
+            selected_context = CONTEXT_SEPARATOR.join(passages[idx] for idx in sorted(selected))
+        
+        logger.warning(
+            f"Context reduced from ~{total_tokens} to ~{estimate_tokens(selected_context)} tokens "
+            f"({len(selected)}/{len(passages)} passages kept)"
+        )
+        return selected_context
+    
+    def _prompt_cache_key(self, prompt: str) -> str:
+        """Build exact-match cache key from model name and prompt"""
+        return hashlib.sha256(f"{settings.GEMINI_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+    
+    def _validate_and_enrich_analysis(self, result: Dict, topic: str, depth: int = 3) -> Dict:
         """Validate AI response and add metadata"""
-        # Ensure required fields exist
-        if "summary" not in result:
-            result["summary"] = f"Analysis of {topic}"
-        if "key_findings" not in result:
-            result["key_findings"] = []
-        if "detailed_analysis" not in result:
-            result["detailed_analysis"] = {"main_content": result.get("summary", "")}
+        # Fill missing fields and attach metadata in a single merge
+        summary = result.get("summary", f"Analysis of {topic}")
+        result = {
+            "summary": summary,
+            "key_findings": [],
+            "detailed_analysis": {"main_content": summary},
+            **result,
+            "metadata": {
+                "topic": topic,
+                "model_used": self.depth_models.get(depth, settings.GEMINI_MODEL),
+                "analysis_version": "1.0"
+            }
+        }
         
         # Ensure key_findings is a list
-        if isinstance(result.get("key_findings"), str):
+        if isinstance(result["key_findings"], str):
             result["key_findings"] = [result["key_findings"]]
         
-        # Add metadata
-        result["metadata"] = {
-            "topic": topic,
-            "model_used": settings.GEMINI_MODEL,
-            "analysis_version": "1.0"
-        }
-        
         return result
     
     async def generate_report_structure(self, research_data: dict) -> dict:
@@ -253,16 +823,21 @@ Key Findings: {research_data.get('key_findings', [])}
 
 Format as JSON with clear hierarchy."""
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.5,
-                    max_output_tokens=1500,
-                    response_mime_type="application/json"
+            cache_key = self._prompt_cache_key(prompt)
+            cached = self._prompt_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Prompt cache hit for report structure")
+                return cached
+            
+            async with self._semaphore:
+                response = await self._generate_content(
+                    self.model,
+                    prompt,
+                    generation_config=self._GEN_CFG_STRUCTURE
                 )
-            )
             
-            result = json.loads(response.text)
+            result = orjson.loads(response.text)
+            self._prompt_cache.set(cache_key, result)
             return result
             
         except Exception as e:
@@ -287,14 +862,20 @@ Format as JSON with clear hierarchy."""
 Content:
 {content}"""
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.6,
-                    max_output_tokens=1000
+            cache_key = self._prompt_cache_key(prompt)
+            cached = self._prompt_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Prompt cache hit for content refinement")
+                return cached
+            
+            async with self._semaphore:
+                response = await self._generate_content(
+                    self.model,
+                    prompt,
+                    generation_config=self._GEN_CFG_REFINE
                 )
-            )
             
+            self._prompt_cache.set(cache_key, response.text)
             return response.text
             
         except Exception as e:
@@ -1,12 +1,17 @@
 import os
+import asyncio
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from typing import Dict, Optional
+from xml.sax.saxutils import escape
+from typing import Dict, Iterator, Optional
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY, TA_RIGHT
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Frame, PageTemplate
+from reportlab.platypus import SimpleDocTemplate, Flowable, Paragraph, Spacer, PageBreak, Frame, PageTemplate
 from reportlab.platypus import Table, TableStyle, Image, KeepTogether
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
@@ -15,6 +20,9 @@ from config.settings import settings
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Colored bullet markup shared by every key finding row
+_FINDING_BULLET = '<font color="#6366f1" size="14"><b>●</b></font>'
+
 
 class CorporateDocTemplate(SimpleDocTemplate):
     """Custom document template with corporate header/footer"""
@@ -91,6 +99,12 @@ class PDFGenerator:
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
         logger.debug("Custom PDF styles configured")
+        
+        # Worker processes for report builds, started on first use
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # Worker log records travel back over a process-safe queue
+        self._log_listener: Optional[QueueListener] = None
     
     def _setup_custom_styles(self):
         """Setup premium corporate paragraph styles"""
@@ -208,6 +222,11 @@ class PDFGenerator:
             alignment=TA_CENTER,
             fontName='Helvetica'
         ))
+        
+        # Styles used per finding/paragraph/source, resolved once
+        self._body_style = self.styles['CustomBody']
+        self._finding_style = self.styles['KeyFinding']
+        self._citation_style = self.styles['Citation']
     
     async def generate_report(
         self,
@@ -218,6 +237,10 @@ class PDFGenerator:
         """
         Generate premium corporate PDF report from research data
         
+        ReportLab rendering is CPU-bound pure Python, so it runs in a worker
+        process; concurrent reports are built in parallel instead of
+        contending for the GIL.
+        
         Args:
             research_data: Research data dictionary
             report_id: Unique report identifier
@@ -226,6 +249,51 @@ class PDFGenerator:
         Returns:
             Path to generated PDF file
         """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(),
+            _build_report_in_worker,
+            research_data,
+            report_id,
+            include_sources
+        )
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the report worker pool, starting it (and its log listener) if needed"""
+        if self._pool is None:
+            # forkserver children don't inherit the parent's threads or open clients
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            mp_context = multiprocessing.get_context(method)
+            
+            # Fresh worker processes have no logging configured; they send records
+            # here and the listener replays them through this process's loggers
+            log_queue = mp_context.Queue()
+            self._log_listener = QueueListener(log_queue, _WorkerLogHandler())
+            self._log_listener.start()
+            
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_WORKERS,
+                mp_context=mp_context,
+                initializer=_init_worker_logging,
+                initargs=(log_queue, logging.getLogger().getEffectiveLevel())
+            )
+        return self._pool
+    
+    def shutdown(self):
+        """Stop the report worker processes and flush their queued log records"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+    
+    def _build_report(
+        self,
+        research_data: Dict,
+        report_id: str,
+        include_sources: bool = True
+    ) -> str:
+        """Build the PDF report synchronously and return its path"""
         try:
             logger.info(f"Generating enterprise PDF report: {report_id}")
             
@@ -233,7 +301,7 @@ class PDFGenerator:
             filename = f"report_{report_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             filepath = os.path.join(settings.REPORTS_PATH, filename)
             
-            logger.debug(f"PDF filepath: {filepath}")
+            logger.debug("PDF filepath: %s", filepath)
             
             # Create corporate PDF document
             doc = CorporateDocTemplate(
@@ -247,184 +315,207 @@ class PDFGenerator:
                 author="AI Research Agent - Powered by Gemini 2.5 Flash"
             )
             
-            # Build content
-            story = []
+            # Build PDF with corporate template
+            logger.debug("Building enterprise PDF document...")
+            doc.build(list(self._iter_flowables(research_data, include_sources)))
             
-            # === COVER PAGE ===
-            story.append(Spacer(1, 1.5*inch))
+            file_size = os.path.getsize(filepath)
+            logger.info(f"Enterprise PDF generated successfully: {filename} ({file_size} bytes)")
             
-            # Main title
-            title = research_data.get('topic', 'Research Report')
-            story.append(Paragraph(title.upper(), self.styles['CoverTitle']))
-            story.append(Spacer(1, 0.2*inch))
+            return filepath
             
-            # Subtitle
-            story.append(Paragraph(
-                "Executive Intelligence Report",
-                self.styles['Subtitle']
-            ))
-            story.append(Spacer(1, 1*inch))
+        except Exception as e:
+            logger.error(f"PDF generation failed for {report_id}: {str(e)}", exc_info=True)
+            raise Exception(f"PDF generation failed: {str(e)}")
+    
+    def _iter_flowables(self, research_data: Dict, include_sources: bool = True) -> Iterator[Flowable]:
+        """
+        Yield the report content in page order
+        
+        Args:
+            research_data: Research data dictionary
+            include_sources: Whether to include sources
             
-            # Metadata box
-            created_at = research_data.get('created_at', datetime.now())
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        Returns:
+            Iterator of ReportLab flowables
+        """
+        # === COVER PAGE ===
+        yield Spacer(1, 1.5*inch)
+        
+        # Main title
+        title = research_data.get('topic', 'Research Report')
+        yield Paragraph(escape(title.upper()), self.styles['CoverTitle'])
+        yield Spacer(1, 0.2*inch)
+        
+        # Subtitle
+        yield Paragraph(
+            "Executive Intelligence Report",
+            self.styles['Subtitle']
+        )
+        yield Spacer(1, 1*inch)
+        
+        # Metadata box
+        created_at = research_data.get('created_at', datetime.now())
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        
+        metadata_data = [
+            ['Report ID:', research_data.get('research_id', 'N/A')],
+            ['Generated:', created_at.strftime('%B %d, %Y')],
+            ['Time:', created_at.strftime('%I:%M %p %Z')],
+            ['AI Model:', 'Google Gemini 2.5 Flash'],
+            ['Classification:', 'CONFIDENTIAL']
+        ]
+        
+        metadata_table = Table(metadata_data, colWidths=[2*inch, 3.5*inch])
+        metadata_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#eff6ff')),
+            ('BACKGROUND', (1, 0), (1, -1), colors.white),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#f8fafc'), colors.white]),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 12),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]))
+        yield metadata_table
+        
+        yield Spacer(1, 0.5*inch)
+        
+        # Disclaimer
+        disclaimer = Paragraph(
+            "<i>This report contains confidential information generated by advanced AI analysis. "
+            "The insights provided are based on comprehensive research from verified sources. "
+            "For internal use only.</i>",
+            self.styles['Metadata']
+        )
+        yield disclaimer
+        
+        yield PageBreak()
+        
+        # === EXECUTIVE SUMMARY ===
+        yield Spacer(1, 0.3*inch)
+        yield Paragraph("EXECUTIVE SUMMARY", self.styles['ExecutiveHeader'])
+        yield Spacer(1, 0.15*inch)
+        
+        summary = research_data.get('summary', 'No summary available.')
+        yield Paragraph(escape(summary), self._body_style)
+        yield Spacer(1, 0.3*inch)
+        
+        # === KEY FINDINGS ===
+        key_findings = research_data.get('key_findings', [])
+        if key_findings:
+            yield Paragraph("KEY FINDINGS & INSIGHTS", self.styles['SectionHeader'])
+            yield Spacer(1, 0.1*inch)
             
-            metadata_data = [
-                ['Report ID:', research_data.get('research_id', 'N/A')],
-                ['Generated:', created_at.strftime('%B %d, %Y')],
-                ['Time:', created_at.strftime('%I:%M %p %Z')],
-                ['AI Model:', 'Google Gemini 2.5 Flash'],
-                ['Classification:', 'CONFIDENTIAL']
+            # Create findings table with colored bullets
+            findings_data = [
+                [
+                    Paragraph(_FINDING_BULLET, self._finding_style),
+                    Paragraph(f'<b>Finding {idx}:</b> {escape(str(finding))}', self._finding_style)
+                ]
+                for idx, finding in enumerate(key_findings, 1)
             ]
             
-            metadata_table = Table(metadata_data, colWidths=[2*inch, 3.5*inch])
-            metadata_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#eff6ff')),
-                ('BACKGROUND', (1, 0), (1, -1), colors.white),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
-                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
-                ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#f8fafc'), colors.white]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            findings_table = Table(findings_data, colWidths=[0.3*inch, 5.7*inch])
+            findings_table.setStyle(TableStyle([
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('LEFTPADDING', (0, 0), (-1, -1), 0),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+                ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
             ]))
-            story.append(metadata_table)
-            
-            story.append(Spacer(1, 0.5*inch))
-            
-            # Disclaimer
-            disclaimer = Paragraph(
-                "<i>This report contains confidential information generated by advanced AI analysis. "
-                "The insights provided are based on comprehensive research from verified sources. "
-                "For internal use only.</i>",
-                self.styles['Metadata']
-            )
-            story.append(disclaimer)
-            
-            story.append(PageBreak())
-            
-            # === EXECUTIVE SUMMARY ===
-            story.append(Spacer(1, 0.3*inch))
-            story.append(Paragraph("EXECUTIVE SUMMARY", self.styles['ExecutiveHeader']))
-            story.append(Spacer(1, 0.15*inch))
-            
-            summary = research_data.get('summary', 'No summary available.')
-            story.append(Paragraph(summary, self.styles['CustomBody']))
-            story.append(Spacer(1, 0.3*inch))
+            yield findings_table
+            yield Spacer(1, 0.3*inch)
+        
+        # === DETAILED ANALYSIS ===
+        detailed_analysis = research_data.get('detailed_analysis', '')
+        if detailed_analysis:
+            yield Paragraph("COMPREHENSIVE ANALYSIS", self.styles['SectionHeader'])
+            yield Spacer(1, 0.15*inch)
             
-            # === KEY FINDINGS ===
-            key_findings = research_data.get('key_findings', [])
-            if key_findings:
-                story.append(Paragraph("KEY FINDINGS & INSIGHTS", self.styles['SectionHeader']))
-                story.append(Spacer(1, 0.1*inch))
+            if isinstance(detailed_analysis, dict):
+                # Process each section with proper formatting
+                section_order = [
+                    ('executive_overview', 'Executive Overview'),
+                    ('market_analysis', 'Market Analysis & Dynamics'),
+                    ('strategic_insights', 'Strategic Insights & Opportunities'),
+                    ('risk_assessment', 'Risk Assessment & Mitigation'),
+                    ('implementation_roadmap', 'Implementation Roadmap'),
+                    ('financial_implications', 'Financial Impact Analysis'),
+                    ('future_outlook', 'Future Outlook & Predictions'),
+                    ('competitive_intelligence', 'Competitive Intelligence')
+                ]
                 
-                # Create findings table with colored bullets
-                findings_data = []
-                for idx, finding in enumerate(key_findings, 1):
-                    bullet = Paragraph(
-                        f'<font color="#6366f1" size="14"><b>●</b></font>',
-                        self.styles['KeyFinding']
-                    )
-                    text = Paragraph(
-                        f'<b>Finding {idx}:</b> {finding}',
-                        self.styles['KeyFinding']
-                    )
-                    findings_data.append([bullet, text])
-                
-                findings_table = Table(findings_data, colWidths=[0.3*inch, 5.7*inch])
-                findings_table.setStyle(TableStyle([
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ]))
-                story.append(findings_table)
-                story.append(Spacer(1, 0.3*inch))
+                for key, title in section_order:
+                    if key in detailed_analysis and detailed_analysis[key]:
+                        yield Paragraph(title, self.styles['SubsectionHeader'])
+                        
+                        # Split content into paragraphs
+                        content = str(detailed_analysis[key])
+                        paragraphs = content.split('\n\n') if '\n\n' in content else [content]
+                        
+                        for para in paragraphs:
+                            if para.strip():
+                                yield Paragraph(escape(para.strip()), self._body_style)
+                                yield Spacer(1, 0.1*inch)
+                        
+                        yield Spacer(1, 0.2*inch)
+            else:
+                # Split by paragraphs for better formatting
+                paragraphs = str(detailed_analysis).split('\n\n')
+                for para in paragraphs:
+                    if para.strip():
+                        yield Paragraph(escape(para.strip()), self._body_style)
+                        yield Spacer(1, 0.1*inch)
             
-            # === DETAILED ANALYSIS ===
-            detailed_analysis = research_data.get('detailed_analysis', '')
-            if detailed_analysis:
-                story.append(Paragraph("COMPREHENSIVE ANALYSIS", self.styles['SectionHeader']))
-                story.append(Spacer(1, 0.15*inch))
+            yield Spacer(1, 0.2*inch)
+        
+        # === SOURCES & REFERENCES ===
+        if include_sources:
+            sources = research_data.get('sources', [])
+            if sources:
+                yield PageBreak()
+                yield Spacer(1, 0.3*inch)
+                yield Paragraph("SOURCES & REFERENCES", self.styles['SectionHeader'])
+                yield Spacer(1, 0.15*inch)
                 
-                if isinstance(detailed_analysis, dict):
-                    # Process each section with proper formatting
-                    section_order = [
-                        ('executive_overview', 'Executive Overview'),
-                        ('market_analysis', 'Market Analysis & Dynamics'),
-                        ('strategic_insights', 'Strategic Insights & Opportunities'),
-                        ('risk_assessment', 'Risk Assessment & Mitigation'),
-                        ('implementation_roadmap', 'Implementation Roadmap'),
-                        ('financial_implications', 'Financial Impact Analysis'),
-                        ('future_outlook', 'Future Outlook & Predictions'),
-                        ('competitive_intelligence', 'Competitive Intelligence')
-                    ]
-                    
-                    for key, title in section_order:
-                        if key in detailed_analysis and detailed_analysis[key]:
-                            story.append(Paragraph(title, self.styles['SubsectionHeader']))
-                            
-                            # Split content into paragraphs
-                            content = str(detailed_analysis[key])
-                            paragraphs = content.split('\n\n') if '\n\n' in content else [content]
-                            
-                            for para in paragraphs:
-                                if para.strip():
-                                    story.append(Paragraph(para.strip(), self.styles['CustomBody']))
-                                    story.append(Spacer(1, 0.1*inch))
-                            
-                            story.append(Spacer(1, 0.2*inch))
-                else:
-                    # Split by paragraphs for better formatting
-                    paragraphs = str(detailed_analysis).split('\n\n')
-                    for para in paragraphs:
-                        if para.strip():
-                            story.append(Paragraph(para.strip(), self.styles['CustomBody']))
-                            story.append(Spacer(1, 0.1*inch))
+                logger.debug("Adding %s sources to PDF", len(sources))
                 
-                story.append(Spacer(1, 0.2*inch))
-            
-            # === SOURCES & REFERENCES ===
-            if include_sources:
-                sources = research_data.get('sources', [])
-                if sources:
-                    story.append(PageBreak())
-                    story.append(Spacer(1, 0.3*inch))
-                    story.append(Paragraph("SOURCES & REFERENCES", self.styles['SectionHeader']))
-                    story.append(Spacer(1, 0.15*inch))
-                    
-                    logger.debug(f"Adding {len(sources)} sources to PDF")
-                    
-                    # Format sources with better styling
-                    for idx, source in enumerate(sources, 1):
-                        source_para = Paragraph(
-                            f'<b>[{idx}]</b> {source}',
-                            self.styles['Citation']
-                        )
-                        story.append(source_para)
-                        story.append(Spacer(1, 0.05*inch))
-            
-            # Build PDF with corporate template
-            logger.debug("Building enterprise PDF document...")
-            doc.build(story)
-            
-            file_size = os.path.getsize(filepath)
-            logger.info(f"Enterprise PDF generated successfully: {filename} ({file_size} bytes)")
-            
-            return filepath
-            
-        except Exception as e:
-            logger.error(f"PDF generation failed for {report_id}: {str(e)}", exc_info=True)
-            raise Exception(f"PDF generation failed: {str(e)}")
+                # Format sources with better styling
+                for idx, source in enumerate(sources, 1):
+                    yield Paragraph(f'<b>[{idx}]</b> {escape(str(source))}', self._citation_style)
+                    yield Spacer(1, 0.05*inch)
+
+
+class _WorkerLogHandler(logging.Handler):
+    """Hand records received from worker processes to the logger they were emitted on"""
+    
+    def emit(self, record: logging.LogRecord):
+        target = logging.getLogger(record.name)
+        if target.isEnabledFor(record.levelno):
+            target.handle(record)
+
+
+def _init_worker_logging(log_queue, level: int):
+    """Process pool initializer; routes the worker's log records to the main process"""
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+
+def _build_report_in_worker(research_data: Dict, report_id: str, include_sources: bool) -> str:
+    """Process pool entry point; builds with the worker's own generator instance"""
+    return pdf_generator._build_report(research_data, report_id, include_sources)
 
 
 # Singleton instance
@@ -1,15 +1,20 @@
+import re
 import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+import unicodedata
+from typing import List, Optional
 from tavily import TavilyClient
 from tenacity import retry, stop_after_attempt, wait_exponential
 from config.settings import settings
 from backend.src.models.schemas import SearchResult
+from backend.src.utils.cache import SingleFlight, TTLCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 class WebSearchService:
     """Web search service using Tavily API with caching and retry logic"""
@@ -17,8 +22,16 @@ class WebSearchService:
     def __init__(self):
         self.client = TavilyClient(api_key=settings.TAVILY_API_KEY)
         self.max_results = settings.MAX_SEARCH_RESULTS
-        self._cache: Dict[str, Dict] = {}
-        self._cache_ttl = timedelta(hours=1)
+        self._cache = TTLCache(
+            max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+            ttl=settings.SEARCH_CACHE_TTL
+        )
+        self._inflight = SingleFlight()
+        
+        # Caps concurrent Tavily requests across all callers; created on first
+        # use so it belongs to the event loop that serves requests
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info("WebSearchService initialized")
     
     @retry(
@@ -40,22 +53,31 @@ class WebSearchService:
         """
         try:
             results_limit = max_results or self.max_results
-            cache_key = f"{query}_{results_limit}"
+            cache_key = self._cache_key(query, results_limit)
             
-            # Check cache
-            if use_cache and cache_key in self._cache:
-                cached_data = self._cache[cache_key]
-                if datetime.now() - cached_data['timestamp'] < self._cache_ttl:
+            # Check cache (expired entries are dropped on read)
+            if use_cache:
+                cached_results = self._cache.get(cache_key)
+                if cached_results is not None:
                     logger.info(f"Using cached results for query: {query[:50]}...")
-                    return cached_data['results']
-                else:
-                    # Remove expired cache entry
-                    del self._cache[cache_key]
+                    return cached_results
             
-            logger.info(f"Performing web search: {query[:50]}... (max_results={results_limit})")
+            # Concurrent identical searches share one Tavily request
+            if use_cache:
+                return await self._inflight.do(cache_key, lambda: self._fetch(query, results_limit, cache_key))
+            return await self._fetch(query, results_limit)
             
-            # Tavily search is synchronous, run in executor
-            loop = asyncio.get_event_loop()
+        except Exception as e:
+            logger.error(f"Web search failed: {str(e)}")
+            raise Exception(f"Web search failed: {str(e)}")
+    
+    async def _fetch(self, query: str, results_limit: int, cache_key: Optional[str] = None) -> List[SearchResult]:
+        """Run a Tavily search and cache the parsed results under cache_key (if given)"""
+        logger.info(f"Performing web search: {query[:50]}... (max_results={results_limit})")
+        
+        # Tavily search is synchronous, run in executor
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
             response = await loop.run_in_executor(
                 None,
                 lambda: self.client.search(
@@ -68,33 +90,45 @@ class WebSearchService:
                     exclude_domains=[]
                 )
             )
-            
-            search_results = []
-            for idx, result in enumerate(response.get('results', []), 1):
-                try:
-                    search_results.append(SearchResult(
-                        title=result.get('title', f'Result {idx}'),
-                        url=result.get('url', ''),
-                        snippet=result.get('content', ''),
-                        relevance_score=result.get('score', 0.0)
-                    ))
-                except Exception as e:
-                    logger.warning(f"Failed to parse search result {idx}: {str(e)}")
-                    continue
-            
-            # Cache results
-            if use_cache and search_results:
-                self._cache[cache_key] = {
-                    'results': search_results,
-                    'timestamp': datetime.now()
-                }
-            
-            logger.info(f"Found {len(search_results)} search results")
-            return search_results
-            
-        except Exception as e:
-            logger.error(f"Web search failed: {str(e)}")
-            raise Exception(f"Web search failed: {str(e)}")
+        
+        search_results = []
+        for idx, result in enumerate(response.get('results', []), 1):
+            try:
+                search_results.append(SearchResult(
+                    title=result.get('title', f'Result {idx}'),
+                    url=result.get('url', ''),
+                    snippet=result.get('content', ''),
+                    relevance_score=result.get('score', 0.0)
+                ))
+            except Exception as e:
+                logger.warning(f"Failed to parse search result {idx}: {str(e)}")
+                continue
+        
+        # Cache results
+        if cache_key is not None and search_results:
+            self._cache.set(cache_key, search_results)
+        
+        logger.info(f"Found {len(search_results)} search results")
+        return search_results
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the Tavily concurrency limiter, creating it for the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.TAVILY_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Canonicalize a query so case, Unicode form and whitespace do not affect caching"""
+        query = unicodedata.normalize("NFKC", query).strip().casefold()
+        return _WHITESPACE_RE.sub(" ", query)
+    
+    def _cache_key(self, query: str, results_limit: int) -> str:
+        """Build a compact cache key from the normalized query and result limit"""
+        key = f"{self._normalize(query)}|{results_limit}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
     
     def clear_cache(self):
         """Clear search cache"""
@@ -114,19 +148,30 @@ class WebSearchService:
         """
         try:
             results = await self.search(query, max_results)
-            
-            context_parts = []
-            for idx, result in enumerate(results, 1):
-                context_parts.append(
-                    f"[Source {idx}] {result.title}\n"
-                    f"URL: {result.url}\n"
-                    f"Content: {result.snippet}\n"
-                )
-            
-            return "\n---\n".join(context_parts)
+            return self.build_context(results)
             
         except Exception as e:
             raise Exception(f"Context retrieval failed: {str(e)}")
+    
+    def build_context(self, results: List[SearchResult]) -> str:
+        """
+        Build combined context from already-fetched search results
+        
+        Args:
+            results: Search results returned by search()
+            
+        Returns:
+            Combined context string
+        """
+        context_parts = []
+        for idx, result in enumerate(results, 1):
+            context_parts.append(
+                f"[Source {idx}] {result.title}\n"
+                f"URL: {result.url}\n"
+                f"Content: {result.snippet}\n"
+            )
+        
+        return "\n---\n".join(context_parts)
 
 
 # Singleton instance
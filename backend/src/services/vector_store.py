@@ -1,14 +1,56 @@
 import os
+import re
+import heapq
+import asyncio
 import logging
+import orjson
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from config.settings import settings
+from backend.src.utils.embeddings import embed
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Research collection; versioned because HNSW space is fixed when a collection is created
+RESEARCH_COLLECTION = "research_data_v2"
+
+# Original collection (L2 space), migrated into RESEARCH_COLLECTION on startup
+LEGACY_RESEARCH_COLLECTION = "research_data"
+
+# Summary section of documents stored before they were serialized as JSON
+_LEGACY_SUMMARY_RE = re.compile(r'Summary: (.*?)(?:\n\n|$)', re.DOTALL)
+
+
+def parse_document(document: str) -> Dict:
+    """
+    Load a stored research document
+    
+    Documents are JSON objects; older plain-text documents only yield their summary.
+    
+    Args:
+        document: Stored document string
+        
+    Returns:
+        Research data dict
+    """
+    try:
+        data = orjson.loads(document)
+        if isinstance(data, dict):
+            return data
+    except orjson.JSONDecodeError:
+        pass
+    
+    match = _LEGACY_SUMMARY_RE.search(document)
+    return {"summary": match.group(1)} if match else {}
+
+
+def embedding_text(topic: str, summary: str) -> str:
+    """Text embedded for a research entry (topic and summary, not the full document)"""
+    return f"{topic}\n\n{summary}"
+
 
 class VectorStore:
     """Vector store using ChromaDB for RAG functionality"""
@@ -28,18 +70,83 @@ class VectorStore:
             )
         )
         
-        # Get or create collection
+        # Get or create collection. Cosine distance matches the normalized
+        # sentence embeddings; HNSW parameters only apply to new collections.
         self.collection = self.client.get_or_create_collection(
-            name="research_data",
-            metadata={"description": "AI Research Agent storage"}
+            name=RESEARCH_COLLECTION,
+            metadata={
+                "description": "AI Research Agent storage",
+                "hnsw:space": "cosine",
+                "hnsw:M": settings.CHROMA_HNSW_M,
+                "hnsw:construction_ef": settings.CHROMA_CONSTRUCTION_EF,
+                "hnsw:search_ef": settings.CHROMA_SEARCH_EF
+            }
         )
         
-        logger.info(f"ChromaDB collection 'research_data' initialized (count: {self.collection.count()})")
+        # Semantic cache of AI analyses, queried with precomputed topic embeddings
+        self.analysis_cache = self.client.get_or_create_collection(
+            name="analysis_cache",
+            metadata={
+                "description": "Cached AI analyses",
+                "hnsw:space": "cosine"
+            }
+        )
+        
+        # Pending writes are coalesced into batched upserts by a background consumer
+        self.batch_size = settings.CHROMA_BATCH_SIZE
+        self.flush_interval = settings.CHROMA_FLUSH_MS / 1000
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._write_task: Optional[asyncio.Task] = None
+        self._write_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        logger.info(f"ChromaDB collection '{RESEARCH_COLLECTION}' initialized (count: {self.collection.count()})")
+    
+    def migrate_legacy_collection(self) -> None:
+        """
+        Move entries from the legacy L2 collection into the cosine collection
+        
+        Runs once: the legacy collection is deleted after its entries are
+        copied, so distances are only ever read from a cosine index. Entries
+        are re-embedded from topic + summary with the local encoder, like new
+        writes, instead of keeping Chroma's default document embeddings.
+        
+        Called at app startup rather than on import, so importing the module
+        (e.g. in PDF worker processes) never touches the legacy collection.
+        """
+        collection_names = {collection.name for collection in self.client.list_collections()}
+        if LEGACY_RESEARCH_COLLECTION not in collection_names:
+            return
+        
+        legacy = self.client.get_collection(LEGACY_RESEARCH_COLLECTION)
+        results = legacy.get(include=["documents", "metadatas"])
+        texts = [
+            embedding_text(
+                metadata.get('topic', ''),
+                metadata.get('summary') or parse_document(document).get('summary', '')
+            )
+            for document, metadata in zip(results['documents'], [metadata or {} for metadata in results['metadatas']])
+        ]
+        
+        for start in range(0, len(results['ids']), self.batch_size):
+            end = start + self.batch_size
+            self.collection.upsert(
+                ids=results['ids'][start:end],
+                embeddings=embed(texts[start:end]).tolist(),
+                documents=results['documents'][start:end],
+                metadatas=results['metadatas'][start:end]
+            )
+        
+        self.client.delete_collection(LEGACY_RESEARCH_COLLECTION)
+        logger.info(f"Migrated {len(results['ids'])} entries from '{LEGACY_RESEARCH_COLLECTION}' to '{RESEARCH_COLLECTION}'")
     
     async def store_research(self, research_id: str, research_data: dict) -> bool:
         """
         Store research data in vector database
         
+        Existing entries with the same ID are overwritten, which lets a
+        pending research stub be replaced by its final result. Writes from
+        concurrent callers are batched into a single upsert.
+        
         Args:
             research_id: Unique research identifier
             research_data: Research data to store
@@ -48,30 +155,87 @@ class VectorStore:
             Success boolean
         """
         try:
-            logger.debug(f"Storing research: {research_id}")
+            logger.debug("Storing research: %s", research_id)
             
             # Prepare document for storage
             document = self._prepare_document(research_data)
+            status = research_data.get("status", "completed")
+            created_at = research_data.get("created_at") or datetime.now().isoformat()
             
-            # Store in ChromaDB
-            self.collection.add(
-                documents=[document],
-                ids=[research_id],
-                metadatas=[{
-                    "research_id": research_id,
-                    "topic": research_data.get("topic", ""),
-                    "created_at": datetime.now().isoformat(),
-                    "status": research_data.get("status", "completed")
-                }]
-            )
+            metadata = {
+                "research_id": research_id,
+                "topic": research_data.get("topic", ""),
+                "created_at": created_at,
+                "created_at_ts": datetime.fromisoformat(created_at).timestamp(),
+                "status": getattr(status, "value", status),
+                "summary": research_data.get("summary") or ""
+            }
             
-            logger.info(f"Successfully stored research: {research_id} (collection size: {self.collection.count()})")
+            # Queue for the batch writer and wait until it is stored in ChromaDB
+            future = asyncio.get_running_loop().create_future()
+            await self._get_write_queue().put((research_id, document, metadata, future))
+            await future
+            
+            logger.info(f"Successfully stored research: {research_id}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to store research {research_id}: {str(e)}", exc_info=True)
             raise Exception(f"Failed to store research: {str(e)}")
     
+    def _get_write_queue(self) -> asyncio.Queue:
+        """Get the write queue, starting the batch writer on the current loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._write_task is None or self._write_task.done() or self._write_loop is not loop:
+            self._write_queue = asyncio.Queue()
+            self._write_loop = loop
+            self._write_task = loop.create_task(self._write_batches(self._write_queue))
+        return self._write_queue
+    
+    async def _write_batches(self, write_queue: asyncio.Queue):
+        """Drain queued writes and upsert them into ChromaDB in batches"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch: List[Tuple[str, str, Dict, asyncio.Future]] = [await write_queue.get()]
+            
+            # Collect more writes until the batch is full or the flush window ends
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # ChromaDB rejects duplicate IDs within one call; the latest write wins
+            latest = {research_id: (document, metadata) for research_id, document, metadata, _ in batch}
+            metadatas = [metadata for _, metadata in latest.values()]
+            
+            try:
+                # Embed topic + summary for the whole batch locally in one call
+                # (bypasses Chroma's default embedder)
+                embeddings = await asyncio.to_thread(
+                    embed, [embedding_text(metadata['topic'], metadata['summary']) for metadata in metadatas]
+                )
+                await asyncio.to_thread(
+                    self.collection.upsert,
+                    ids=list(latest),
+                    embeddings=embeddings.tolist(),
+                    documents=[document for document, _ in latest.values()],
+                    metadatas=metadatas
+                )
+                logger.debug("Stored batch of %s research entries", len(latest))
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_result(True)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
     async def get_research(self, research_id: str) -> Optional[Dict]:
         """
         Retrieve research data by ID
@@ -83,7 +247,8 @@ class VectorStore:
             Research data dict or None
         """
         try:
-            results = self.collection.get(
+            results = await asyncio.to_thread(
+                self.collection.get,
                 ids=[research_id],
                 include=["documents", "metadatas"]
             )
@@ -100,42 +265,51 @@ class VectorStore:
         except Exception as e:
             raise Exception(f"Failed to retrieve research: {str(e)}")
     
-    async def search_similar(self, query: str, n_results: int = 5) -> List[Dict]:
+    async def search_similar(self, query: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
         """
         Search for similar research by query
         
         Args:
             query: Search query
             n_results: Number of results to return
+            where: Optional metadata filter (e.g. {"status": "completed"})
             
         Returns:
-            List of similar research results
+            List of similar research results, closest first
         """
         try:
-            results = self.collection.query(
-                query_texts=[query],
+            query_embedding = await asyncio.to_thread(embed, query)
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=[query_embedding.tolist()],
                 n_results=n_results,
+                where=where,
                 include=["documents", "metadatas", "distances"]
             )
             
-            similar_results = []
-            if results['ids'] and results['ids'][0]:
-                for idx in range(len(results['ids'][0])):
-                    similar_results.append({
-                        "research_id": results['ids'][0][idx],
-                        "document": results['documents'][0][idx],
-                        "metadata": results['metadatas'][0][idx],
-                        "distance": results['distances'][0][idx]
-                    })
+            if not results['ids'] or not results['ids'][0]:
+                return []
             
-            return similar_results
+            return [
+                {
+                    "research_id": research_id,
+                    "document": document,
+                    "metadata": metadata,
+                    "distance": distance
+                }
+                for research_id, document, metadata, distance in zip(
+                    results['ids'][0], results['documents'][0], results['metadatas'][0], results['distances'][0]
+                )
+            ]
             
         except Exception as e:
             raise Exception(f"Failed to search similar research: {str(e)}")
     
     async def get_all_research(self, limit: Optional[int] = None) -> List[Dict]:
         """
-        Get all stored research
+        Get all stored research, newest first
+        
+        Only metadata is loaded; documents are not needed for listings.
         
         Args:
             limit: Optional limit on number of results
@@ -144,53 +318,120 @@ class VectorStore:
             List of all research data
         """
         try:
-            results = self.collection.get(
-                include=["documents", "metadatas"]
-            )
+            results = await asyncio.to_thread(self.collection.get, include=["metadatas"])
             
-            all_research = []
-            for idx in range(len(results['ids'])):
-                all_research.append({
-                    "research_id": results['ids'][idx],
-                    "metadata": results['metadatas'][idx]
-                })
-            
-            # Sort by created_at descending
-            all_research.sort(
-                key=lambda x: x['metadata'].get('created_at', ''),
-                reverse=True
-            )
+            all_research = [
+                {"research_id": research_id, "metadata": metadata}
+                for research_id, metadata in zip(results['ids'], results['metadatas'])
+            ]
             
+            # Keep only the newest `limit` entries instead of sorting everything
             if limit:
-                all_research = all_research[:limit]
+                return heapq.nlargest(limit, all_research, key=self._created_at_ts)
             
-            return all_research
+            return sorted(all_research, key=self._created_at_ts, reverse=True)
             
         except Exception as e:
             raise Exception(f"Failed to get all research: {str(e)}")
     
+    @staticmethod
+    def _created_at_ts(research: Dict) -> float:
+        """Creation time as epoch seconds (parsed from ISO for entries stored without created_at_ts)"""
+        metadata = research['metadata']
+        if 'created_at_ts' in metadata:
+            return metadata['created_at_ts']
+        try:
+            return datetime.fromisoformat(metadata.get('created_at', '')).timestamp()
+        except ValueError:
+            return 0.0
+    
+    async def query_analysis_cache(
+        self,
+        embedding: List[float],
+        where: Optional[Dict] = None,
+        n_results: int = 3
+    ) -> List[Dict]:
+        """
+        Find cached analyses closest to a topic embedding
+        
+        Args:
+            embedding: Normalized topic embedding
+            where: Optional metadata filter
+            n_results: Number of candidates to return
+            
+        Returns:
+            List of dicts with metadata and cosine similarity, best match first
+        """
+        try:
+            results = await asyncio.to_thread(
+                self.analysis_cache.query,
+                query_embeddings=[embedding],
+                n_results=n_results,
+                where=where,
+                include=["metadatas", "distances"]
+            )
+            
+            if not results['ids'] or not results['ids'][0]:
+                return []
+            
+            return [
+                {
+                    "cache_id": cache_id,
+                    "metadata": metadata,
+                    "similarity": 1 - distance
+                }
+                for cache_id, metadata, distance in zip(
+                    results['ids'][0], results['metadatas'][0], results['distances'][0]
+                )
+            ]
+            
+        except Exception as e:
+            raise Exception(f"Failed to query analysis cache: {str(e)}")
+    
+    async def add_cached_analysis(self, cache_id: str, embedding: List[float], topic: str, metadata: Dict) -> None:
+        """
+        Store an analysis in the semantic cache (overwrites the same cache ID)
+        
+        Args:
+            cache_id: Cache entry identifier
+            embedding: Normalized topic embedding
+            topic: Research topic (stored as the document)
+            metadata: Entry metadata including the serialized result
+        """
+        try:
+            await asyncio.to_thread(
+                self.analysis_cache.upsert,
+                ids=[cache_id],
+                embeddings=[embedding],
+                documents=[topic],
+                metadatas=[metadata]
+            )
+        except Exception as e:
+            raise Exception(f"Failed to cache analysis: {str(e)}")
+    
     def _prepare_document(self, research_data: dict) -> str:
         """
         Prepare research data as document string
         
+        The document is a JSON object with sorted keys, so the same data
+        always serializes identically and can be loaded back with parse_document.
+        
         Args:
             research_data: Research data
             
         Returns:
             Document string
         """
-        parts = [
-            f"Topic: {research_data.get('topic', '')}",
-            f"Summary: {research_data.get('summary', '')}",
-        ]
-        
-        if research_data.get('key_findings'):
-            parts.append(f"Key Findings: {', '.join(research_data['key_findings'])}")
-        
-        if research_data.get('raw_content'):
-            parts.append(f"Content: {research_data['raw_content']}")
+        document = {
+            "topic": research_data.get('topic', ''),
+            "summary": research_data.get('summary') or '',
+            "key_findings": research_data.get('key_findings') or [],
+            "detailed_analysis": research_data.get('detailed_analysis') or {},
+            "sources": research_data.get('sources') or [],
+            "raw_content": research_data.get('raw_content') or ''
+        }
         
-        return "\n\n".join(parts)
+        return orjson.dumps(document, option=orjson.OPT_SORT_KEYS).decode("utf-8")
 
 
 # Singleton instance
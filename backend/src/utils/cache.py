@@ -0,0 +1,99 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Size-capped LRU cache with per-entry expiry
+    
+    Expired entries are dropped when read; the least recently used entry is
+    evicted once max_entries is reached.
+    """
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any):
+        """Store value, evicting the least recently used entry when full"""
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        """Remove key if present"""
+        self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all cached entries"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution
+    
+    The first caller runs the work; callers arriving while it is in flight
+    await the same result (or exception) instead of repeating it.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func for key unless an identical call is already in flight
+        
+        Args:
+            key: Deduplication key
+            func: Zero-argument coroutine factory doing the work
+            
+        Returns:
+            Result of the shared call
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            # Shield so a cancelled follower does not cancel the leader's result
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
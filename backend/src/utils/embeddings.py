@@ -0,0 +1,33 @@
+import logging
+from functools import lru_cache
+from typing import List, Union
+
+import numpy as np
+
+from config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """Load the sentence embedding model once per process (on first use)"""
+    from sentence_transformers import SentenceTransformer
+    
+    encoder = SentenceTransformer(settings.EMBEDDING_MODEL)
+    logger.info(f"Loaded embedding model: {settings.EMBEDDING_MODEL}")
+    return encoder
+
+
+def embed(text: Union[str, List[str]]) -> np.ndarray:
+    """
+    Compute normalized sentence embedding(s)
+    
+    Args:
+        text: Single text or list of texts
+    
+    Returns:
+        Embedding vector, or matrix with one row per text
+    """
+    return get_encoder().encode(text, normalize_embeddings=True)
@@ -3,19 +3,41 @@ Diagnostic script to check if all dependencies are installed correctly
 """
 
 import sys
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
-def check_import(module_name, display_name=None):
-    """Check if a module can be imported"""
-    if display_name is None:
-        display_name = module_name
+def find_module(module_name):
+    """Locate a module on sys.path without importing it; returns an error message or None"""
+    # Already imported in this process, no lookup needed
+    if module_name in sys.modules:
+        return None
     
     try:
-        __import__(module_name)
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError) as e:
+        return str(e)
+    
+    if spec is None:
+        return f"No module named '{module_name}'"
+    return None
+
+
+def report_module(display_name, error):
+    """Print the result of a module check"""
+    if error is None:
         print(f"✅ {display_name}")
         return True
-    except ImportError as e:
-        print(f"❌ {display_name} - {str(e)}")
-        return False
+    
+    print(f"❌ {display_name} - {error}")
+    return False
+
+
+def check_import(module_name, display_name=None):
+    """Check if a module is installed (located on sys.path without importing it)"""
+    if display_name is None:
+        display_name = module_name
+    
+    return report_module(display_name, find_module(module_name))
 
 
 def main():
@@ -36,7 +58,7 @@ def main():
         ("uvicorn", "Uvicorn"),
         ("pydantic", "Pydantic"),
         ("pydantic_settings", "Pydantic Settings"),
-        ("openai", "OpenAI"),
+        ("google.generativeai", "Google Generative AI"),
         ("tavily", "Tavily"),
         ("chromadb", "ChromaDB"),
         ("sentence_transformers", "Sentence Transformers"),
@@ -50,8 +72,12 @@ def main():
     passed = 0
     failed = 0
     
-    for module, name in checks:
-        if check_import(module, name):
+    # Probe concurrently to overlap filesystem lookups, then print in order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        errors = list(executor.map(find_module, [module for module, _ in checks]))
+    
+    for (module, name), error in zip(checks, errors):
+        if report_module(name, error):
             passed += 1
         else:
             failed += 1
@@ -77,8 +103,18 @@ def main():
         ("requirements.txt", "Requirements"),
     ]
     
+    # List each parent directory once instead of stat()-ing every path;
+    # (directory, name) keys avoid comparing "/" and "\" separators on Windows
+    present = set()
+    for directory in {os.path.dirname(path) for path, _ in paths_to_check}:
+        try:
+            with os.scandir(directory or ".") as entries:
+                present.update((directory, entry.name) for entry in entries)
+        except OSError:
+            continue
+    
     for path, name in paths_to_check:
-        if os.path.exists(path):
+        if (os.path.dirname(path), os.path.basename(path)) in present:
             print(f"✅ {name} ({path})")
         else:
             print(f"❌ {name} ({path}) - NOT FOUND")
@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, List
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,8 @@ class Settings(BaseSettings):
     # Google Gemini
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_MODEL_LIGHT: str = "gemini-2.5-flash-lite"  # depth 1
+    GEMINI_MODEL_PRO: str = "gemini-2.5-pro"  # depth 4-5
     
     # Tavily
     TAVILY_API_KEY: str
@@ -18,6 +21,12 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # uvicorn worker processes when DEBUG is off. Keep at 1: the embedded Chroma
+    # client and the pending-research/history caches are per process
+    WORKERS: int = 1
+    
+    # CORS (empty list disables the middleware)
+    ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
     
     # Storage
     CHROMA_DB_PATH: str = "./data/chroma_db"
@@ -27,6 +36,38 @@ class Settings(BaseSettings):
     MAX_RESEARCH_DEPTH: int = 5
     MAX_SEARCH_RESULTS: int = 10
     SEARCH_TIMEOUT: int = 30
+    CONTEXT_TOKEN_BUDGET: int = 4000  # search context sent to the model
+    
+    # Concurrency limits for outbound API calls
+    GEMINI_CONCURRENCY: int = 5  # size to the Gemini RPM quota
+    TAVILY_CONCURRENCY: int = 5
+    PDF_WORKERS: int = 2  # PDF build processes per app worker
+    
+    # ChromaDB HNSW index (applied when the collection is created)
+    CHROMA_HNSW_M: int = 32
+    CHROMA_CONSTRUCTION_EF: int = 200
+    CHROMA_SEARCH_EF: int = 64
+    
+    # ChromaDB write batching
+    CHROMA_BATCH_SIZE: int = 64
+    CHROMA_FLUSH_MS: int = 50
+    
+    # Cache
+    RESEARCH_CACHE_MAX_ENTRIES: int = 1000
+    RESEARCH_CACHE_TTL: int = 3600  # seconds
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    SEARCH_CACHE_TTL: int = 3600  # seconds
+    PROMPT_CACHE_MAX_ENTRIES: int = 1000
+    PROMPT_CACHE_TTL: int = 3600  # seconds
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MIN_OVERLAP: float = 0.6  # word-level Jaccard guard
+    SEMANTIC_CACHE_CONTEXT_THRESHOLD: float = 0.9  # context similarity when hashes differ
+    SEMANTIC_CACHE_TTL: int = 3600  # seconds
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    
+    # Prior research reused as analysis context (cosine distance, 0 disables)
+    PRIOR_RESEARCH_MAX_DISTANCE: float = 0.15
     
     model_config = {
         "env_file": ".env",
@@ -34,4 +75,10 @@ class Settings(BaseSettings):
     }
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings from the environment and .env once per process"""
+    return Settings()
+
+
+settings = get_settings()
@@ -19,25 +19,16 @@ const HomePage = () => {
 
     setIsLoading(true);
     setError(null);
-    setProgressStatus('🔍 Initializing research...');
+    setProgressStatus('🔍 Submitting research...');
 
     try {
-      // Simulate progress updates
-      setTimeout(() => setProgressStatus('🌐 Searching web sources...'), 1000);
-      setTimeout(() => setProgressStatus('📊 Collecting data from ' + maxResults + ' sources...'), 3000);
-      setTimeout(() => setProgressStatus('🤖 AI analyzing findings...'), 8000);
-      setTimeout(() => setProgressStatus('📝 Generating comprehensive report...'), 15000);
-      setTimeout(() => setProgressStatus('✨ Finalizing world-class analysis...'), 25000);
-
+      // /research returns immediately; the research page polls until it completes
       const response = await axios.post('http://localhost:8000/research', {
         topic: topic.trim(),
         max_results: maxResults
       });
 
-      setProgressStatus('✅ Complete! Redirecting...');
-      setTimeout(() => {
-        navigate(`/research/${response.data.research_id}`);
-      }, 500);
+      navigate(`/research/${response.data.research_id}`);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to start research. Please try again.');
       setIsLoading(false);
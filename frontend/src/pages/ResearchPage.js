@@ -6,6 +6,22 @@ import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
 import './ResearchPage.css';
 
+const API_URL = 'http://localhost:8000';
+const POLL_INTERVAL_MS = 2000;
+const FINAL_STATUSES = ['completed', 'failed'];
+
+// detailed_analysis is an object of named sections (older entries store plain text)
+const formatAnalysis = (analysis) => {
+  if (!analysis || typeof analysis === 'string') return analysis || '';
+  return Object.entries(analysis)
+    .filter(([, text]) => text)
+    .map(([key, text]) => {
+      const title = key.replace(/_/g, ' ').replace(/\b\w/g, (c) => c.toUpperCase());
+      return `### ${title}\n\n${text}`;
+    })
+    .join('\n\n');
+};
+
 const ResearchPage = () => {
   const { id } = useParams();
   const [research, setResearch] = useState(null);
@@ -13,32 +29,48 @@ const ResearchPage = () => {
   const [error, setError] = useState(null);
   const [isGeneratingPdf, setIsGeneratingPdf] = useState(false);
 
-  const fetchResearch = async () => {
-    try {
-      const response = await axios.get(`http://localhost:8000/research/${id}`);
-      setResearch(response.data);
-      setIsLoading(false);
-    } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to load research');
-      setIsLoading(false);
-    }
-  };
-
+  // Research runs in the background: poll until it is completed or failed
   useEffect(() => {
-    fetchResearch();
-    // eslint-disable-next-line react-hooks/exhaustive-deps
+    let cancelled = false;
+    let timer = null;
+
+    const poll = async () => {
+      try {
+        const response = await axios.get(`${API_URL}/research/${id}`);
+        if (cancelled) return;
+        setResearch(response.data);
+        setIsLoading(false);
+        if (!FINAL_STATUSES.includes(response.data.status)) {
+          timer = setTimeout(poll, POLL_INTERVAL_MS);
+        }
+      } catch (err) {
+        if (cancelled) return;
+        setError(err.response?.data?.detail || 'Failed to load research');
+        setIsLoading(false);
+      }
+    };
+
+    setResearch(null);
+    setError(null);
+    setIsLoading(true);
+    poll();
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [id]);
 
   const generatePdfReport = async () => {
     setIsGeneratingPdf(true);
     try {
-      const response = await axios.post('http://localhost:8000/report', {
+      const response = await axios.post(`${API_URL}/report`, {
         research_id: id,
         include_sources: true
       });
 
       // Download the PDF - fix URL to include full backend address
-      const downloadUrl = `http://localhost:8000${response.data.download_url}`;
+      const downloadUrl = `${API_URL}${response.data.download_url}`;
       window.open(downloadUrl, '_blank');
     } catch (err) {
       alert('Failed to generate PDF report');
@@ -56,11 +88,11 @@ const ResearchPage = () => {
     );
   }
 
-  if (error) {
+  if (error || research.status === 'failed') {
     return (
       <div className="error-container">
         <AlertCircle size={48} />
-        <p>{error}</p>
+        <p>{error || research.summary || 'Research failed'}</p>
         <Link to="/" className="back-button">
           <ArrowLeft size={20} />
           Back to Home
@@ -69,6 +101,18 @@ const ResearchPage = () => {
     );
   }
 
+  if (research.status !== 'completed') {
+    return (
+      <div className="loading-container">
+        <Loader2 className="spin-icon" size={48} />
+        <p>Researching "{research.metadata.topic}"...</p>
+        <p className="research-date">Searching the web and analyzing sources. This usually takes 10-60 seconds.</p>
+      </div>
+    );
+  }
+
+  const analysis = formatAnalysis(research.detailed_analysis);
+
   return (
     <motion.div 
       className="research-page"
@@ -122,7 +166,7 @@ const ResearchPage = () => {
       </motion.div>
 
       {/* Summary */}
-      {research.metadata.summary && (
+      {research.summary && (
         <motion.div 
           className="research-section glass-effect"
           initial={{ opacity: 0, y: 20 }}
@@ -134,13 +178,13 @@ const ResearchPage = () => {
             Summary
           </h2>
           <div className="summary-content">
-            <ReactMarkdown>{research.metadata.summary}</ReactMarkdown>
+            <ReactMarkdown>{research.summary}</ReactMarkdown>
           </div>
         </motion.div>
       )}
 
       {/* Key Findings */}
-      {research.metadata.key_findings && research.metadata.key_findings.length > 0 && (
+      {research.key_findings && research.key_findings.length > 0 && (
         <motion.div 
           className="research-section glass-effect"
           initial={{ opacity: 0, y: 20 }}
@@ -152,7 +196,7 @@ const ResearchPage = () => {
             Key Findings
           </h2>
           <div className="key-findings-grid">
-            {research.metadata.key_findings.map((finding, index) => (
+            {research.key_findings.map((finding, index) => (
               <motion.div
                 key={index}
                 className="finding-card"
@@ -169,7 +213,7 @@ const ResearchPage = () => {
       )}
 
       {/* Detailed Analysis */}
-      {research.metadata.detailed_analysis && (
+      {analysis && (
         <motion.div 
           className="research-section glass-effect"
           initial={{ opacity: 0, y: 20 }}
@@ -178,13 +222,13 @@ const ResearchPage = () => {
         >
           <h2 className="section-title">Detailed Analysis</h2>
           <div className="analysis-content">
-            <ReactMarkdown>{research.metadata.detailed_analysis}</ReactMarkdown>
+            <ReactMarkdown>{analysis}</ReactMarkdown>
           </div>
         </motion.div>
       )}
 
       {/* Sources */}
-      {research.metadata.sources && research.metadata.sources.length > 0 && (
+      {research.sources && research.sources.length > 0 && (
         <motion.div 
           className="research-section glass-effect"
           initial={{ opacity: 0, y: 20 }}
@@ -193,10 +237,10 @@ const ResearchPage = () => {
         >
           <h2 className="section-title">
             <ExternalLink size={24} />
-            Sources ({research.metadata.sources.length})
+            Sources ({research.sources.length})
           </h2>
           <div className="sources-list">
-            {research.metadata.sources.map((source, index) => (
+            {research.sources.map((source, index) => (
               <motion.a
                 key={index}
                 href={source}
@@ -2,10 +2,17 @@
 Quick start script for AI Research Agent
 """
 
+import re
 import subprocess
 import sys
 import os
 
+# API key assignments in .env (one pass over the file)
+_ENV_KEY_RE = re.compile(r'^\s*(?P<key>GEMINI_API_KEY|TAVILY_API_KEY)\s*=\s*(?P<value>\S.*?)\s*$', re.M)
+
+# Values shipped in .env.example
+_PLACEHOLDER_KEYS = {"your_gemini_api_key_here", "your_tavily_api_key_here"}
+
 def check_env_file():
     """Check if .env file exists and has required keys"""
     if not os.path.exists('.env'):
@@ -20,12 +27,13 @@ def check_env_file():
             print("   - TAVILY_API_KEY")
             return False
     
-    # Check if keys are set
+    # Check if keys are set (commented-out, empty and placeholder values don't count)
     with open('.env', 'r') as f:
-        content = f.read()
-        if 'GEMINI_API_KEY=' in content and 'GEMINI_API_KEY=your_gemini_api_key_here' not in content:
-            if 'TAVILY_API_KEY=' in content:
-                return True
+        found = {match['key']: match['value'] for match in _ENV_KEY_RE.finditer(f.read())}
+    
+    values = [found.get(key) for key in ("GEMINI_API_KEY", "TAVILY_API_KEY")]
+    if all(value and value not in _PLACEHOLDER_KEYS for value in values):
+        return True
     
     print("⚠️  API keys not configured in .env file")
     print("Please add your API keys to .env:")
@@ -56,14 +64,21 @@ def start_server():
     print("Press Ctrl+C to stop the server")
     print()
     
+    command = [
+        sys.executable, "-m", "uvicorn",
+        "backend.main:app",
+        "--reload",
+        "--host", "0.0.0.0",
+        "--port", "8000"
+    ]
+    
+    # On POSIX, uvicorn replaces this process instead of running as a child
+    if os.name == "posix":
+        sys.stdout.flush()
+        os.execv(sys.executable, command)
+    
     try:
-        subprocess.run([
-            sys.executable, "-m", "uvicorn",
-            "backend.main:app",
-            "--reload",
-            "--host", "0.0.0.0",
-            "--port", "8000"
-        ])
+        subprocess.run(command)
     except KeyboardInterrupt:
         print("\n\n👋 Server stopped")
 
@@ -1,20 +1,41 @@
 """
 Test API with Gemini Integration
 """
-import requests
+import asyncio
+import httpx
 import json
+import os
 import time
 
 BASE_URL = "http://localhost:8000"
+SERVER_WAIT_TIMEOUT = 30  # seconds
+RESEARCH_TIMEOUT = 180  # seconds to wait for a submitted research to finish
 
-def test_health():
-    """Test health endpoint"""
+async def wait_for_server(client, timeout=SERVER_WAIT_TIMEOUT):
+    """Poll /health every 100ms until the server answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/health", timeout=1)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    return False
+
+
+def check_response(title, response):
+    """Print and check the result of a simple GET endpoint (response may be an exception)"""
     print("\n" + "="*60)
-    print("TEST 1: Health Check")
+    print(title)
     print("="*60)
     
+    if isinstance(response, Exception):
+        print(f"ERROR: {response}")
+        return False
+    
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
         print(f"Status Code: {response.status_code}")
         print(f"Response: {json.dumps(response.json(), indent=2)}")
         return response.status_code == 200
@@ -23,23 +44,36 @@ def test_health():
         return False
 
 
-def test_root():
+async def check_health(client):
+    """Test health endpoint"""
+    try:
+        return await client.get("/health", timeout=5)
+    except Exception as e:
+        return e
+
+
+async def check_root(client):
     """Test root endpoint"""
-    print("\n" + "="*60)
-    print("TEST 2: Root Endpoint")
-    print("="*60)
-    
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=5)
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        return response.status_code == 200
+        return await client.get("/", timeout=5)
     except Exception as e:
-        print(f"ERROR: {e}")
-        return False
+        return e
+
+
+async def wait_for_research(client, research_id, timeout=RESEARCH_TIMEOUT):
+    """Poll /research/{id} until the research is completed or failed; returns the details or None"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(f"/research/{research_id}", timeout=10)
+        response.raise_for_status()
+        details = response.json()
+        if details["status"] in ("completed", "failed"):
+            return details
+        await asyncio.sleep(2)
+    return None
 
 
-def test_research():
+async def check_research(client):
     """Test research endpoint with Gemini"""
     print("\n" + "="*60)
     print("TEST 3: Research with Gemini AI")
@@ -52,41 +86,50 @@ def test_research():
         }
         
         print(f"Sending request: {json.dumps(payload, indent=2)}")
-        print("This may take 10-30 seconds...")
         
-        response = requests.post(
-            f"{BASE_URL}/research",
-            json=payload,
-            timeout=60
-        )
+        response = await client.post("/research", json=payload, timeout=60)
         
         print(f"\nStatus Code: {response.status_code}")
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\nResearch ID: {data.get('research_id')}")
-            print(f"Topic: {data.get('topic')}")
-            print(f"Status: {data.get('status')}")
-            print(f"\nSummary:\n{data.get('summary')}")
-            print(f"\nKey Findings ({len(data.get('key_findings', []))}):")
-            for i, finding in enumerate(data.get('key_findings', []), 1):
-                print(f"  {i}. {finding}")
-            print(f"\nSources ({len(data.get('sources', []))}):")
-            for source in data.get('sources', []):
-                print(f"  - {source}")
-            return True
-        else:
+        if response.status_code != 200:
             print(f"ERROR Response: {response.text}")
             return False
+        
+        # /research returns a pending entry; the pipeline runs in the background
+        data = response.json()
+        print(f"\nResearch ID: {data['research_id']}")
+        print(f"Status: {data['status']}")
+        print("Waiting for research to finish (may take 10-60 seconds)...")
+        
+        details = await wait_for_research(client, data['research_id'])
+        if details is None:
+            print(f"ERROR: Research not finished after {RESEARCH_TIMEOUT}s")
+            return False
+        
+        print(f"Topic: {details['metadata'].get('topic')}")
+        print(f"Status: {details['status']}")
+        print(f"\nSummary:\n{details['summary']}")
+        if details['status'] != "completed":
+            return False
+        
+        print(f"\nKey Findings ({len(details['key_findings'])}):")
+        for i, finding in enumerate(details['key_findings'], 1):
+            print(f"  {i}. {finding}")
+        print(f"\nSources ({len(details['sources'])}):")
+        for source in details['sources']:
+            print(f"  - {source}")
+        return True
             
     except Exception as e:
-        print(f"ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"ERROR: {type(e).__name__}: {e}")
+        # Full traceback only on request (VERBOSE=1)
+        if os.environ.get("VERBOSE"):
+            import traceback
+            traceback.print_exc()
         return False
 
 
-def main():
+async def main():
     """Run all tests"""
     print("\n" + "="*60)
     print("AI RESEARCH AGENT - GEMINI INTEGRATION TEST")
@@ -94,14 +137,21 @@ def main():
     
     results = []
     
-    # Test 1: Health
-    results.append(("Health Check", test_health()))
-    
-    # Test 2: Root
-    results.append(("Root Endpoint", test_root()))
-    
-    # Test 3: Research with Gemini
-    results.append(("Research with Gemini", test_research()))
+    # One pooled keep-alive client for every request
+    limits = httpx.Limits(max_keepalive_connections=5)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60, limits=limits) as client:
+        # Wait for server to be ready
+        print("Waiting for server to be ready...")
+        if not await wait_for_server(client):
+            print(f"Server not reachable after {SERVER_WAIT_TIMEOUT}s, running tests anyway")
+        
+        # Tests 1-2: Health and root are independent, so request them concurrently
+        health, root = await asyncio.gather(check_health(client), check_root(client))
+        results.append(("Health Check", check_response("TEST 1: Health Check", health)))
+        results.append(("Root Endpoint", check_response("TEST 2: Root Endpoint", root)))
+        
+        # Test 3: Research with Gemini
+        results.append(("Research with Gemini", await check_research(client)))
     
     # Summary
     print("\n" + "="*60)
@@ -123,12 +173,8 @@ def main():
 
 
 if __name__ == "__main__":
-    # Wait for server to be ready
-    print("Waiting for server to be ready...")
-    time.sleep(2)
-    
     try:
-        success = main()
+        success = asyncio.run(main())
         exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\nTest interrupted by user")
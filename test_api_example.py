@@ -34,8 +34,21 @@ def test_root_endpoint():
     print()
 
 
+def wait_for_research(research_id, timeout=180, interval=2):
+    """Poll research details until the status is completed or failed"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = requests.get(f"{BASE_URL}/research/{research_id}")
+        response.raise_for_status()
+        details = response.json()
+        if details['status'] in ("completed", "failed"):
+            return details
+        time.sleep(interval)
+    return None
+
+
 def conduct_research(topic, depth=3, max_results=5):
-    """Conduct research on a topic"""
+    """Conduct research on a topic and wait for it to finish"""
     print(f"🔍 Conducting research on: {topic}")
     
     payload = {
@@ -46,21 +59,30 @@ def conduct_research(topic, depth=3, max_results=5):
     
     response = requests.post(f"{BASE_URL}/research", json=payload)
     
-    if response.status_code == 200:
-        data = response.json()
-        print("✅ Research completed!")
-        print(f"Research ID: {data['research_id']}")
-        print(f"Status: {data['status']}")
-        print(f"\nSummary:\n{data.get('summary', 'N/A')}")
-        print(f"\nKey Findings:")
-        for i, finding in enumerate(data.get('key_findings', []), 1):
-            print(f"  {i}. {finding}")
-        print(f"\nSources found: {len(data.get('sources', []))}")
-        return data['research_id']
-    else:
+    if response.status_code != 200:
         print(f"❌ Research failed: {response.status_code}")
         print(response.text)
         return None
+    
+    # The research runs in the background; poll until it is done
+    research_id = response.json()['research_id']
+    print(f"Research ID: {research_id} (waiting for completion...)")
+    details = wait_for_research(research_id)
+    
+    if details is None:
+        print("❌ Research did not finish in time")
+        return None
+    if details['status'] != "completed":
+        print(f"❌ Research failed: {details['summary']}")
+        return None
+    
+    print("✅ Research completed!")
+    print(f"\nSummary:\n{details['summary']}")
+    print("\nKey Findings:")
+    for i, finding in enumerate(details['key_findings'], 1):
+        print(f"  {i}. {finding}")
+    print(f"\nSources found: {len(details['sources'])}")
+    return research_id
 
 
 def generate_report(research_id):
@@ -125,9 +147,7 @@ def main():
     )
     
     if research_id:
-        time.sleep(2)  # Wait a bit
-        
-        # Test 4: Generate report
+        # Test 4: Generate report (research is complete at this point)
         generate_report(research_id)
         
         time.sleep(1)
@@ -139,7 +159,7 @@ def main():
     print("\n" + "=" * 60)
     print("⚠️  To test research and report generation, you need to:")
     print("1. Add your API keys to .env file:")
-    print("   - OPENAI_API_KEY")
+    print("   - GEMINI_API_KEY")
     print("   - TAVILY_API_KEY")
     print("2. Uncomment the research test code above")
     print("3. Run this script again")
@@ -5,204 +5,252 @@ Tests: retry logic, caching, logging, error handling
 
 import sys
 import os
+import importlib
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-print("=" * 70)
-print("🧪 AI Research Agent - Production Enhancements Test")
-print("=" * 70)
-print()
 
-# Test 1: Import all modules
-print("1️⃣ Testing imports...")
-try:
-    from config.settings import settings
-    print("   ✅ Settings imported")
-    
-    from backend.src.services.agent import AIAgent
-    print("   ✅ AIAgent imported (with @retry)")
-    
-    from backend.src.services.search import WebSearchService
-    print("   ✅ WebSearchService imported (with caching)")
-    
-    from backend.src.services.vector_store import VectorStore
-    print("   ✅ VectorStore imported")
-    
-    from backend.src.services.pdf_generator import PDFGenerator
-    print("   ✅ PDFGenerator imported")
-    
-    import tenacity
-    print(f"   ✅ Tenacity imported (retry logic)")
-    
-    import logging
-    print("   ✅ Logging imported")
+def check_1_imports():
+    """Check 1: Import all modules"""
+    print("1️⃣ Testing imports...")
+    modules = [
+        ("config.settings", "settings", "Settings imported"),
+        ("backend.src.services.agent", "AIAgent", "AIAgent imported (with @retry)"),
+        ("backend.src.services.search", "WebSearchService", "WebSearchService imported (with caching)"),
+        ("backend.src.services.vector_store", "VectorStore", "VectorStore imported"),
+        ("backend.src.services.pdf_generator", "PDFGenerator", "PDFGenerator imported"),
+        ("tenacity", None, "Tenacity imported (retry logic)"),
+        ("logging", None, "Logging imported"),
+    ]
+    try:
+        for module_name, attribute, message in modules:
+            module = importlib.import_module(module_name)
+            if attribute is not None and not hasattr(module, attribute):
+                raise ImportError(f"cannot import name '{attribute}' from '{module_name}'")
+            print(f"   ✅ {message}")
+        
+    except ImportError as e:
+        print(f"   ❌ Import failed: {e}")
+        sys.exit(1)
     
-except ImportError as e:
-    print(f"   ❌ Import failed: {e}")
-    sys.exit(1)
+    print()
 
-print()
 
-# Test 2: Verify tenacity decorators
-print("2️⃣ Verifying retry decorators...")
-try:
-    agent = AIAgent()
-    
-    # Check if analyze_topic has retry decorator
-    if hasattr(agent.analyze_topic, '__wrapped__'):
-        print("   ✅ analyze_topic() has @retry decorator")
-    else:
-        print("   ⚠️  analyze_topic() retry status unclear")
-    
-    search_service = WebSearchService()
+def check_2_retry():
+    """Check 2: Verify tenacity decorators"""
+    from backend.src.services.agent import agent
+    from backend.src.services.search import search_service
     
-    # Check if search has retry decorator
-    if hasattr(search_service.search, '__wrapped__'):
-        print("   ✅ search() has @retry decorator")
-    else:
-        print("   ⚠️  search() retry status unclear")
+    print("2️⃣ Verifying retry decorators...")
+    try:
         
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+        # Check if Gemini calls have retry decorator
+        if hasattr(agent._generate_content, '__wrapped__'):
+            print("   ✅ _generate_content() has @retry decorator")
+        else:
+            print("   ⚠️  _generate_content() retry status unclear")
+        
+        # Check if search has retry decorator
+        if hasattr(search_service.search, '__wrapped__'):
+            print("   ✅ search() has @retry decorator")
+        else:
+            print("   ⚠️  search() retry status unclear")
+            
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+    
+    print()
 
-print()
 
-# Test 3: Verify caching mechanism
-print("3️⃣ Verifying caching mechanism...")
-try:
-    search_service = WebSearchService()
+def check_3_caching():
+    """Check 3: Verify caching mechanism"""
+    from backend.src.services.search import search_service
     
-    if hasattr(search_service, '_cache'):
-        print(f"   ✅ Search service has cache (_cache attribute exists)")
-        print(f"   ℹ️  Cache TTL: 1 hour")
-    else:
-        print("   ❌ Search service missing _cache attribute")
-    
-    if hasattr(search_service, 'clear_cache'):
-        print("   ✅ clear_cache() method exists")
-    else:
-        print("   ❌ clear_cache() method missing")
+    print("3️⃣ Verifying caching mechanism...")
+    try:
+        if hasattr(search_service, '_cache'):
+            print("   ✅ Search service has cache (_cache attribute exists)")
+            print("   ℹ️  Cache TTL: 1 hour")
+        else:
+            print("   ❌ Search service missing _cache attribute")
         
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+        if hasattr(search_service, 'clear_cache'):
+            print("   ✅ clear_cache() method exists")
+        else:
+            print("   ❌ clear_cache() method missing")
+            
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+    
+    print()
 
-print()
 
-# Test 4: Test logging configuration
-print("4️⃣ Testing logging configuration...")
-try:
-    from backend.main import setup_logging
-    
-    # Setup logging
-    logger = setup_logging()
-    
-    print(f"   ✅ Logger initialized: {logger.name}")
-    print(f"   ✅ Logger level: {logging.getLevelName(logger.level)}")
-    print(f"   ✅ Handler count: {len(logger.handlers)}")
-    
-    # Check for RotatingFileHandler
-    has_file_handler = any(
-        isinstance(h, logging.handlers.RotatingFileHandler) 
-        for h in logger.handlers
-    )
+def check_4_logging():
+    """Check 4: Test logging configuration"""
+    import logging
+    import logging.handlers
     
-    if has_file_handler:
-        print("   ✅ RotatingFileHandler configured (10MB max, 5 backups)")
-    else:
-        print("   ⚠️  RotatingFileHandler not detected")
+    print("4️⃣ Testing logging configuration...")
+    try:
+        import backend.main as app_main
+        
+        # Setup logging
+        logger = app_main.setup_logging()
+        
+        print(f"   ✅ Logger initialized: {logger.name}")
+        print(f"   ✅ Logger level: {logging.getLevelName(logger.level)}")
+        print(f"   ✅ Handler count: {len(logger.handlers)}")
+        
+        # Check for RotatingFileHandler (file/console handlers sit behind the queue listener)
+        handlers = list(logger.handlers)
+        if app_main.log_listener is not None:
+            handlers.extend(app_main.log_listener.handlers)
+        handler_types = {type(h) for h in handlers}
+        
+        if logging.handlers.RotatingFileHandler in handler_types:
+            print("   ✅ RotatingFileHandler configured (10MB max, 5 backups)")
+        else:
+            print("   ⚠️  RotatingFileHandler not detected")
+        
+        # Test log message
+        logger.info("Test log message - production enhancements verified")
+        print("   ✅ Test log message written")
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
     
-    # Test log message
-    logger.info("Test log message - production enhancements verified")
-    print("   ✅ Test log message written")
+    print()
+
+
+def check_5_environment():
+    """Check 5: Verify environment variables"""
+    from config.settings import settings
     
-except Exception as e:
-    print(f"   ❌ Error: {e}")
-
-print()
-
-# Test 5: Verify environment variables
-print("5️⃣ Checking environment configuration...")
-try:
-    print(f"   App: {settings.APP_NAME} v{settings.APP_VERSION}")
-    print(f"   OpenAI Model: {settings.OPENAI_MODEL}")
-    print(f"   Max Search Results: {settings.MAX_SEARCH_RESULTS}")
-    print(f"   ChromaDB Path: {settings.CHROMA_DB_PATH}")
-    print(f"   Reports Path: {settings.REPORTS_PATH}")
+    print("5️⃣ Checking environment configuration...")
+    try:
+        print(f"   App: {settings.APP_NAME} v{settings.APP_VERSION}")
+        print(f"   Gemini Model: {settings.GEMINI_MODEL}")
+        print(f"   Max Search Results: {settings.MAX_SEARCH_RESULTS}")
+        print(f"   ChromaDB Path: {settings.CHROMA_DB_PATH}")
+        print(f"   Reports Path: {settings.REPORTS_PATH}")
+        
+        # Check API keys (masked)
+        if settings.GEMINI_API_KEY:
+            masked = settings.GEMINI_API_KEY[:8] + "..." + settings.GEMINI_API_KEY[-4:]
+            print(f"   ✅ Gemini API Key: {masked}")
+        else:
+            print("   ⚠️  Gemini API Key not set")
+        
+        if settings.TAVILY_API_KEY:
+            masked = settings.TAVILY_API_KEY[:8] + "..." + settings.TAVILY_API_KEY[-4:]
+            print(f"   ✅ Tavily API Key: {masked}")
+        else:
+            print("   ⚠️  Tavily API Key not set")
+            
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
     
-    # Check API keys (masked)
-    if settings.OPENAI_API_KEY:
-        masked = settings.OPENAI_API_KEY[:8] + "..." + settings.OPENAI_API_KEY[-4:]
-        print(f"   ✅ OpenAI API Key: {masked}")
-    else:
-        print("   ⚠️  OpenAI API Key not set")
+    print()
+
+
+def check_6_directories():
+    """Check 6: Verify directory structure"""
+    from config.settings import settings
     
-    if settings.TAVILY_API_KEY:
-        masked = settings.TAVILY_API_KEY[:8] + "..." + settings.TAVILY_API_KEY[-4:]
-        print(f"   ✅ Tavily API Key: {masked}")
-    else:
-        print("   ⚠️  Tavily API Key not set")
-        
-except Exception as e:
-    print(f"   ❌ Error: {e}")
-
-print()
-
-# Test 6: Verify directory structure
-print("6️⃣ Verifying directory structure...")
-try:
-    required_dirs = [
-        settings.CHROMA_DB_PATH,
-        settings.REPORTS_PATH,
-        "logs"
-    ]
+    print("6️⃣ Verifying directory structure...")
+    try:
+        required_dirs = [
+            settings.CHROMA_DB_PATH,
+            settings.REPORTS_PATH,
+            "logs"
+        ]
+        
+        # Create directly; an existing directory surfaces as FileExistsError (no separate stat)
+        for dir_path in required_dirs:
+            try:
+                os.makedirs(dir_path)
+            except FileExistsError:
+                print(f"   ✅ {dir_path}")
+            else:
+                print(f"   ❌ Missing: {dir_path}")
+                print(f"      Created: {dir_path}")
+                
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
     
-    for dir_path in required_dirs:
-        if os.path.exists(dir_path):
-            print(f"   ✅ {dir_path}")
-        else:
-            print(f"   ❌ Missing: {dir_path}")
-            os.makedirs(dir_path, exist_ok=True)
-            print(f"      Created: {dir_path}")
-            
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+    print()
 
-print()
 
-# Test 7: Service initialization
-print("7️⃣ Testing service initialization...")
-try:
-    agent = AIAgent()
-    print("   ✅ AIAgent initialized")
+def check_7_services():
+    """Check 7: Service initialization"""
+    print("7️⃣ Testing service initialization...")
+    try:
+        # Importing a service module builds its shared singleton instance
+        from backend.src.services.agent import agent
+        print("   ✅ AIAgent initialized")
+        print(f"      Models by depth: {sorted(set(agent.depth_models.values()))}")
+        
+        from backend.src.services.search import search_service
+        print("   ✅ WebSearchService initialized")
+        print(f"      Max results: {search_service.max_results}")
+        
+        from backend.src.services.vector_store import vector_store
+        print("   ✅ VectorStore initialized")
+        print(f"      Collection count: {vector_store.collection.count()}")
+        
+        from backend.src.services.pdf_generator import pdf_generator
+        print("   ✅ PDFGenerator initialized")
+        print(f"      Report styles: {len(pdf_generator.styles.byName)}")
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
     
-    search = WebSearchService()
-    print("   ✅ WebSearchService initialized")
+    print()
+
+
+# Named check_* so pytest does not collect them; all run by default, pass numbers to run a subset
+# (e.g. `python test_enhancements.py 4 5`)
+CHECKS = {
+    1: check_1_imports,
+    2: check_2_retry,
+    3: check_3_caching,
+    4: check_4_logging,
+    5: check_5_environment,
+    6: check_6_directories,
+    7: check_7_services,
+}
+
+
+def main():
+    """Run the selected checks, importing backend services only for checks that use them"""
+    selected = [int(arg) for arg in sys.argv[1:]] or list(CHECKS)
     
-    vector = VectorStore()
-    print("   ✅ VectorStore initialized")
-    print(f"      Collection count: {vector.collection.count()}")
+    print("=" * 70)
+    print("🧪 AI Research Agent - Production Enhancements Test")
+    print("=" * 70)
+    print()
     
-    pdf = PDFGenerator()
-    print("   ✅ PDFGenerator initialized")
+    for number in selected:
+        CHECKS[number]()
     
-except Exception as e:
-    print(f"   ❌ Error: {e}")
-
-print()
-print("=" * 70)
-print("🎉 Production Enhancement Tests Complete!")
-print("=" * 70)
-print()
-print("Summary:")
-print("  ✅ Retry logic with tenacity")
-print("  ✅ Caching mechanism (1-hour TTL)")
-print("  ✅ Advanced logging (RotatingFileHandler)")
-print("  ✅ Enhanced error handling")
-print("  ✅ All services initialized successfully")
-print()
-print("Next steps:")
-print("  1. Start server: python start.py")
-print("  2. Check logs in: logs/ai_research_agent.log")
-print("  3. Test API endpoints at: http://localhost:8000/docs")
-print()
+    print("=" * 70)
+    print("🎉 Production Enhancement Tests Complete!")
+    print("=" * 70)
+    print()
+    print("Summary:")
+    print("  ✅ Retry logic with tenacity")
+    print("  ✅ Caching mechanism (1-hour TTL)")
+    print("  ✅ Advanced logging (RotatingFileHandler)")
+    print("  ✅ Enhanced error handling")
+    print("  ✅ All services initialized successfully")
+    print()
+    print("Next steps:")
+    print("  1. Start server: python start.py")
+    print("  2. Check logs in: logs/ai_research_agent.log")
+    print("  3. Test API endpoints at: http://localhost:8000/docs")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Verifies that Gemini API is properly configured and working
 
 import sys
 import os
+import importlib.util
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
@@ -14,11 +15,12 @@ print("🧪 Google Gemini 2.0 Flash - Integration Test")
 print("=" * 70)
 print()
 
-# Test 1: Import Gemini SDK
+# Test 1: Locate Gemini SDK (imported on first use, after the configuration check)
 print("1️⃣ Testing Gemini SDK import...")
 try:
-    import google.generativeai as genai
-    print("   ✅ google-generativeai imported successfully")
+    if importlib.util.find_spec("google.generativeai") is None:
+        raise ImportError("No module named 'google.generativeai'")
+    print("   ✅ google-generativeai installed")
 except ImportError as e:
     print(f"   ❌ Import failed: {e}")
     sys.exit(1)
@@ -62,6 +64,8 @@ print()
 # Test 4: Test simple Gemini API call
 print("4️⃣ Testing Gemini API connection...")
 try:
+    import google.generativeai as genai
+    
     genai.configure(api_key=settings.GEMINI_API_KEY)
     model = genai.GenerativeModel(settings.GEMINI_MODEL)
     
@@ -0,0 +1,272 @@
+import time
+import orjson
+import numpy as np
+import pytest
+from google.api_core import exceptions as google_exceptions
+from tenacity import wait_none
+from config.settings import settings
+from backend.src.models.schemas import DetailedAnalysis
+from backend.src.services.vector_store import vector_store
+from backend.src.services.agent import agent, estimate_tokens, parse_partial_json, token_overlap
+
+
+def stream_of(text):
+    """Replace AIAgent.stream_analysis with a fake stream yielding text in two chunks"""
+    async def fake_stream(topic, context=None, depth=3, max_tokens=None, retry_setup=True):
+        middle = len(text) // 2
+        yield text[:middle]
+        yield text[middle:]
+    return fake_stream
+
+
+@pytest.fixture
+def offline_agent(monkeypatch):
+    """Agent with semantic cache and prior research lookups disabled"""
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    
+    async def no_prior_research(topic):
+        return None
+    
+    monkeypatch.setattr(agent, "_find_prior_research", no_prior_research)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_recovers_truncated_response(offline_agent, monkeypatch):
+    """Output cut off at the token cap keeps its completed fields and is flagged"""
+    truncated = (
+        '{"summary": "Complete summary.", "key_findings": ["First", "Sec'
+    )
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of(truncated))
+    
+    result = await offline_agent.analyze_topic("Truncated response topic", depth=1)
+    
+    assert result["summary"] == "Complete summary."
+    assert result["key_findings"] == ["First", "Sec"]
+    assert result["detailed_analysis"] == {"main_content": "Complete summary."}
+    assert result["metadata"]["truncated"] is True
+    assert result["metadata"]["topic"] == "Truncated response topic"
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_fails_when_truncated_before_summary(offline_agent, monkeypatch):
+    """Output cut off before any summary text still raises"""
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of('{"summ'))
+    
+    with pytest.raises(Exception, match="AI returned invalid JSON"):
+        await offline_agent.analyze_topic("Summary never arrived topic", depth=1)
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_complete_response_is_not_flagged(offline_agent, monkeypatch):
+    """A complete response validates against the schema without recovery"""
+    sections = ", ".join(
+        f'"{name}": "{name} text"'
+        for name in (
+            "executive_overview", "market_analysis", "strategic_insights", "risk_assessment",
+            "implementation_roadmap", "financial_implications", "future_outlook",
+            "competitive_intelligence"
+        )
+    )
+    complete = f'{{"summary": "Done.", "key_findings": ["One"], "detailed_analysis": {{{sections}}}}}'
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of(complete))
+    
+    result = await offline_agent.analyze_topic("Complete response topic", depth=1)
+    
+    assert result["detailed_analysis"]["market_analysis"] == "market_analysis text"
+    assert "truncated" not in result["metadata"]
+
+
+def test_parse_partial_json_cut_inside_string():
+    """A string value still being written is returned as a partial string"""
+    assert parse_partial_json('{"summary": "Hello wor') == {"summary": "Hello wor"}
+    assert parse_partial_json('{"summary": "Done", "key_fin') == {"summary": "Done"}
+    assert parse_partial_json('{"summ') == {}
+    assert parse_partial_json('') is None
+
+
+def test_parse_partial_json_cut_inside_escape():
+    """Half-received escapes are dropped; complete ones are kept"""
+    assert parse_partial_json('{"a": "x\\') == {"a": "x"}
+    assert parse_partial_json('{"a": "x\\u00') == {"a": "x"}
+    assert parse_partial_json('{"a": "x\\u00e9') == {"a": "x\u00e9"}
+    assert parse_partial_json('{"a": "x\\ud83d') == {"a": "x"}
+    assert parse_partial_json('{"a": "x\\ud83d\\ude00') == {"a": "x\U0001F600"}
+
+
+def test_parse_partial_json_keeps_complete_backslash_escape():
+    """A complete \\\\ escape at the cut point stays in the value"""
+    assert parse_partial_json('{"path": "C:\\\\') == {"path": "C:\\"}
+    assert parse_partial_json('{"path": "C:\\\\\\') == {"path": "C:\\"}
+    assert parse_partial_json('{"done": "a", "path": "\\\\') == {"done": "a", "path": "\\"}
+
+
+def test_parse_partial_json_cut_inside_nested_objects():
+    """Open objects and arrays are closed after the last complete value"""
+    text = '{"key_findings": ["One", "Two"], "detailed_analysis": {"market_analysis": "Gro'
+    assert parse_partial_json(text) == {
+        "key_findings": ["One", "Two"],
+        "detailed_analysis": {"market_analysis": "Gro"}
+    }
+    assert parse_partial_json('{"a": {"b": [1, {"c": tr') == {"a": {"b": [1, {}]}}
+    assert parse_partial_json('{"a": {"b": 12') == {"a": {}}
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_stream_yields_growing_partials(offline_agent, monkeypatch):
+    """Partials only grow and the last value is the validated analysis"""
+    sections = ", ".join(f'"{name}": "{name} text"' for name in DetailedAnalysis.model_fields)
+    complete = f'{{"summary": "Done.", "key_findings": ["One"], "detailed_analysis": {{{sections}}}}}'
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of(complete))
+    
+    analyses = [analysis async for analysis in offline_agent.analyze_topic_stream("Streamed topic", depth=1)]
+    
+    assert analyses[0] == parse_partial_json(complete[:len(complete) // 2])
+    assert analyses[-1]["detailed_analysis"]["future_outlook"] == "future_outlook text"
+    assert analyses[-1]["metadata"]["topic"] == "Streamed topic"
+
+
+class FakeChunk:
+    """Streamed Gemini chunk with only the attributes stream_analysis reads"""
+    
+    def __init__(self, text):
+        self.parts = [text] if text else []
+        self.text = text
+
+
+class FakeStreamResponse:
+    """Async iterable stand-in for a streamed Gemini response"""
+    
+    def __init__(self, texts):
+        self.chunks = [FakeChunk(text) for text in texts]
+        self.candidates = []
+    
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_analysis_yields_text_chunks(monkeypatch):
+    """Chunks without parts (finish/safety information) are skipped"""
+    async def fake_generate(model, prompt, **kwargs):
+        assert kwargs["stream"] is True
+        return FakeStreamResponse(['{"summary": ', "", '"Hi"}'])
+    
+    monkeypatch.setattr(agent, "_generate_content", fake_generate)
+    
+    chunks = [chunk async for chunk in agent.stream_analysis("Stream topic", depth=1)]
+    
+    assert chunks == ['{"summary": ', '"Hi"}']
+
+
+@pytest.mark.asyncio
+async def test_stream_analysis_raises_on_empty_response(monkeypatch):
+    """A stream without any text (e.g. blocked) raises"""
+    async def fake_generate(model, prompt, **kwargs):
+        return FakeStreamResponse([""])
+    
+    monkeypatch.setattr(agent, "_generate_content", fake_generate)
+    
+    with pytest.raises(Exception, match="empty response"):
+        [chunk async for chunk in agent.stream_analysis("Blocked topic", depth=1)]
+
+
+def test_estimate_tokens_ascii_and_non_ascii():
+    """ASCII counts CHARS_PER_TOKEN characters per token; other characters one each"""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+    assert estimate_tokens("你好") == 3
+    assert estimate_tokens("abcdé") == 3
+
+
+def test_token_overlap():
+    """Jaccard overlap of lowercased word sets"""
+    assert token_overlap("Quantum computing", "quantum COMPUTING") == 1.0
+    assert token_overlap("quantum computing news", "quantum computing") == 2 / 3
+    assert token_overlap("solar power", "wind farms") == 0.0
+    assert token_overlap("", "anything") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_hit_reports_requested_topic(monkeypatch):
+    """A hit for a similar topic returns metadata for the current request"""
+    cached_result = {"summary": "Cached.", "metadata": {"topic": "Latest AI trends", "analysis_version": "1.0"}}
+    
+    async def fake_query(embedding, where=None, n_results=3):
+        return [{
+            "cache_id": "entry",
+            "similarity": 0.99,
+            "metadata": {
+                "topic": "Latest AI trends",
+                "ts": time.time(),
+                "context_hash": "hash",
+                "result_json": orjson.dumps(cached_result).decode("utf-8")
+            }
+        }]
+    
+    monkeypatch.setattr(vector_store, "query_analysis_cache", fake_query)
+    
+    result = await agent._lookup_cached_analysis(
+        "latest AI trends", np.ones(3, dtype=np.float32), None, 1, None, "hash"
+    )
+    
+    assert result["summary"] == "Cached."
+    assert result["metadata"]["topic"] == "latest AI trends"
+    assert result["metadata"]["cached_topic"] == "Latest AI trends"
+    assert result["metadata"]["model_used"] == agent.depth_models[1]
+    assert result["metadata"]["analysis_version"] == "1.0"
+
+
+@pytest.mark.asyncio
+async def test_closing_analysis_stream_releases_gemini_permit(offline_agent, monkeypatch):
+    """An abandoned stream gives its semaphore permit back once closed"""
+    async def fake_generate(model, prompt, **kwargs):
+        return FakeStreamResponse(['{"summary": "Par', 'tial", ', '"key_findings": []}'])
+    
+    monkeypatch.setattr(offline_agent, "_generate_content", fake_generate)
+    permits = offline_agent._semaphore._value
+    
+    stream = offline_agent.analyze_topic_stream("Abandoned topic", depth=1)
+    assert await stream.__anext__() == {"summary": "Par"}
+    assert offline_agent._semaphore._value == permits - 1
+    
+    await stream.aclose()
+    assert offline_agent._semaphore._value == permits
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_stream_recovers_truncated_response(offline_agent, monkeypatch):
+    """The stream's final value goes through the same truncation recovery as analyze_topic"""
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of('{"summary": "Cut short.", "key_findings": ["On'))
+    
+    analyses = [analysis async for analysis in offline_agent.analyze_topic_stream("Cut topic", depth=1)]
+    
+    assert analyses[-1]["summary"] == "Cut short."
+    assert analyses[-1]["metadata"]["truncated"] is True
+    
+    monkeypatch.setattr(offline_agent, "stream_analysis", stream_of('{"summ'))
+    with pytest.raises(Exception, match="AI returned invalid JSON"):
+        [analysis async for analysis in offline_agent.analyze_topic_stream("Cut topic", depth=1)]
+
+
+@pytest.mark.asyncio
+async def test_analyze_topic_retries_stream_failing_mid_response(offline_agent, monkeypatch):
+    """A transient error while reading the stream restarts the whole request"""
+    attempts = []
+    
+    async def flaky_stream(topic, context=None, depth=3, max_tokens=None, retry_setup=True):
+        attempts.append(retry_setup)
+        yield '{"summary": "Retried.", '
+        if len(attempts) == 1:
+            raise google_exceptions.ServiceUnavailable("stream dropped")
+        yield '"key_findings": []}'
+    
+    monkeypatch.setattr(offline_agent, "stream_analysis", flaky_stream)
+    monkeypatch.setattr(type(offline_agent)._collect_analysis.retry, "wait", wait_none())
+    
+    result = await offline_agent.analyze_topic("Flaky stream topic", depth=1)
+    
+    # Connection setup is not retried separately inside the whole-request retry
+    assert attempts == [False, False]
+    assert result["summary"] == "Retried."
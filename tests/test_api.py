@@ -1,11 +1,33 @@
+import runpy
+import orjson
 import pytest
 from fastapi.testclient import TestClient
-from backend.main import app
+import backend.main as backend_main
+from backend.main import app, _pending_research
+from backend.src.models.schemas import ResearchRequest
+from backend.src.utils.cache import TTLCache
+from backend.src.services.agent import agent
+from backend.src.services.search import search_service
+from backend.src.services.vector_store import vector_store
 
-client = TestClient(app)
 
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient shared by every test"""
+    return TestClient(app)
 
-def test_root_endpoint():
+
+def test_worker_reimport_skips_services():
+    """Re-imported as __mp_main__ by a PDF worker, main.py builds no services or log handlers"""
+    namespace = runpy.run_path(backend_main.__file__, run_name="__mp_main__")
+    
+    assert "app" in namespace
+    assert "agent" not in namespace
+    assert "pdf_generator" not in namespace
+    assert "logger" not in namespace
+
+
+def test_root_endpoint(client):
     """Test root endpoint"""
     response = client.get("/")
     assert response.status_code == 200
@@ -15,7 +37,7 @@ def test_root_endpoint():
     assert "endpoints" in data
 
 
-def test_health_check():
+def test_health_check(client):
     """Test health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
@@ -25,7 +47,7 @@ def test_health_check():
     assert "service" in data
 
 
-def test_research_endpoint_validation():
+def test_research_endpoint_validation(client):
     """Test research endpoint with invalid data"""
     # Test with missing topic
     response = client.post("/research", json={})
@@ -43,7 +65,7 @@ def test_research_endpoint_validation():
     assert response.status_code == 422
 
 
-def test_history_endpoint():
+def test_history_endpoint(client):
     """Test history endpoint"""
     response = client.get("/history?limit=5")
     assert response.status_code == 200
@@ -54,19 +76,146 @@ def test_history_endpoint():
     assert isinstance(data["research"], list)
 
 
-def test_invalid_research_id():
+def test_invalid_research_id(client):
     """Test getting non-existent research"""
     response = client.get("/research/invalid_id_12345")
     # Should return 404 or 500 depending on implementation
     assert response.status_code in [404, 500]
 
 
-def test_report_endpoint_validation():
+def test_download_invalid_filename(client):
+    """Test download rejects names that are not plain PDF filenames"""
+    response = client.get("/download/settings.py")
+    assert response.status_code == 400
+    
+    response = client.get("/download/..%2F.env.pdf")
+    assert response.status_code == 400
+    
+    response = client.get("/download/..%2F..%2Freports%2Fsecret.pdf")
+    assert response.status_code == 400
+
+
+def test_download_missing_report(client):
+    """Test download of a well-formed but unknown report name"""
+    response = client.get("/download/report_missing_test.pdf")
+    assert response.status_code == 404
+
+
+def test_report_endpoint_validation(client):
     """Test report endpoint with invalid data"""
     # Test with missing research_id
     response = client.post("/report", json={})
     assert response.status_code == 422
 
 
+def test_research_details_for_pending_stub(client, monkeypatch):
+    """Test a just-submitted research is served from its pending stub"""
+    monkeypatch.setitem(_pending_research, "res_stub_test", {
+        "research_id": "res_stub_test",
+        "document": "",
+        "metadata": {"research_id": "res_stub_test", "topic": "Stub topic", "status": "pending", "summary": ""}
+    })
+    
+    response = client.get("/research/res_stub_test")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["research_id"] == "res_stub_test"
+    assert data["status"] == "pending"
+    assert data["metadata"]["topic"] == "Stub topic"
+    assert data["summary"] == ""
+    assert data["key_findings"] == []
+    assert data["sources"] == []
+
+
+def test_research_submission_returns_pending_stub(client, monkeypatch):
+    """Test /research answers with a pending entry and records the pipeline outcome"""
+    stored = {}
+    
+    async def fake_store(research_id, research_data):
+        status = research_data["status"]
+        stored.setdefault(research_id, []).append(getattr(status, "value", status))
+        return True
+    
+    async def failing_search(query, max_results=10):
+        raise Exception("search offline")
+    
+    monkeypatch.setattr(vector_store, "store_research", fake_store)
+    monkeypatch.setattr(search_service, "search", failing_search)
+    
+    response = client.post("/research", json={"topic": "Pending stub contract topic", "depth": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["research_id"].startswith("res_")
+    assert data["topic"] == "Pending stub contract topic"
+    assert data["status"] == "pending"
+    
+    # TestClient runs background tasks before returning: stub first, then the failure
+    assert stored[data["research_id"]] == ["pending", "failed"]
+
+
+def test_research_cache_hit_returns_cached_result(client, monkeypatch):
+    """Test a repeated topic returns the earlier research with its summary and findings"""
+    research_cache = TTLCache(max_entries=10, ttl=60)
+    cache_key = backend_main._research_cache_key(ResearchRequest(topic="Cached  research TOPIC", depth=1))
+    research_cache.set(cache_key, "res_cached_test")
+    monkeypatch.setattr(backend_main, "_research_cache", research_cache)
+    
+    async def fake_get_research(research_id):
+        assert research_id == "res_cached_test"
+        return {
+            "research_id": research_id,
+            "document": orjson.dumps({"summary": "Cached summary", "key_findings": ["Finding"], "sources": ["https://example.com"]}).decode(),
+            "metadata": {"research_id": research_id, "topic": "Cached research topic", "status": "completed", "summary": "Cached summary", "created_at": "2024-01-01T00:00:00"}
+        }
+    
+    monkeypatch.setattr(vector_store, "get_research", fake_get_research)
+    
+    response = client.post("/research", json={"topic": "cached research topic", "depth": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["research_id"] == "res_cached_test"
+    assert data["status"] == "completed"
+    assert data["summary"] == "Cached summary"
+    assert data["key_findings"] == ["Finding"]
+    assert data["sources"] == ["https://example.com"]
+
+
+def test_report_requires_completed_research(client, monkeypatch):
+    """Test report generation is rejected with 409 until research completes"""
+    monkeypatch.setitem(_pending_research, "res_pending_test", {
+        "research_id": "res_pending_test",
+        "document": "",
+        "metadata": {"research_id": "res_pending_test", "topic": "Pending topic", "status": "pending", "summary": ""}
+    })
+    
+    response = client.post("/report", json={"research_id": "res_pending_test"})
+    assert response.status_code == 409
+    assert "pending" in response.json()["detail"]
+
+
+def test_research_stream_endpoint(client, monkeypatch):
+    """Test streaming research sends NDJSON partials, then the final analysis"""
+    async def no_results(query, max_results=10):
+        return []
+    
+    async def fake_stream(topic, context=None, depth=3, max_tokens=None):
+        yield '{"summary": "Streamed sum'
+        yield 'mary", "key_findings": ["One"]'
+    
+    monkeypatch.setattr(search_service, "search", no_results)
+    monkeypatch.setattr(agent, "stream_analysis", fake_stream)
+    
+    response = client.post("/research/stream", json={"topic": "Streaming topic", "depth": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"summary": "Streamed sum"}
+    assert lines[1] == {"summary": "Streamed summary", "key_findings": ["One"]}
+    # The stream ends before detailed_analysis: recovered like analyze_topic
+    assert lines[-1]["summary"] == "Streamed summary"
+    assert lines[-1]["metadata"]["truncated"] is True
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from backend.src.utils import cache as cache_module
+from backend.src.utils.cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    """Controllable stand-in for time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    """Entries are served until their TTL passes, then dropped on read"""
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = TTLCache(max_entries=10, ttl=60)
+    
+    cache.set("key", "value")
+    clock.now += 59
+    assert cache.get("key") == "value"
+    
+    clock.now += 1
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_set_refreshes_expiry(monkeypatch):
+    """Overwriting a key restarts its TTL"""
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = TTLCache(max_entries=10, ttl=60)
+    
+    cache.set("key", "old")
+    clock.now += 50
+    cache.set("key", "new")
+    clock.now += 50
+    assert cache.get("key") == "new"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """At max_entries the least recently used entry is evicted"""
+    cache = TTLCache(max_entries=2, ttl=60)
+    
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_delete():
+    """delete removes one entry and ignores missing keys"""
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_ttl_cache_clear():
+    """clear removes every entry"""
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call():
+    """Concurrent callers with the same key await a single execution"""
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+    
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+    
+    release.set()
+    assert await asyncio.gather(*waiters) == ["result"] * 5
+    assert calls == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_distinct_keys_run_separately():
+    """Different keys are not collapsed"""
+    flight = SingleFlight()
+    
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+    
+    results = await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+    assert results == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_exception_reaches_every_waiter_and_is_not_cached():
+    """A failure is raised to all concurrent callers; the next call runs again"""
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+    
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        raise ValueError("boom")
+    
+    waiters = [asyncio.create_task(flight.do("key", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+    
+    async def succeeding():
+        return "recovered"
+    
+    assert await flight.do("key", succeeding) == "recovered"
@@ -0,0 +1,39 @@
+import os
+import sys
+import logging
+from backend.src.services.pdf_generator import PDFGenerator
+
+
+def log_in_worker(message):
+    """Runs in a report worker process"""
+    logging.getLogger("backend.src.services.pdf_generator").warning(message)
+    return True
+
+
+def app_modules_in_worker():
+    """Runs in a report worker process"""
+    return [name for name in ("backend.main", "backend.src.services.agent", "chromadb") if name in sys.modules]
+
+
+def test_worker_log_records_reach_main_process(caplog):
+    """Records logged in a pool worker are replayed through the main process loggers"""
+    generator = PDFGenerator()
+    try:
+        assert generator._get_pool().submit(log_in_worker, "hello from worker").result(timeout=60)
+    finally:
+        # Stops the listener after draining the queue
+        generator.shutdown()
+    
+    assert any(
+        record.getMessage() == "hello from worker" and record.process != os.getpid()
+        for record in caplog.records
+    )
+
+
+def test_worker_imports_only_report_builder():
+    """Report workers do not load the app, the agent or the Chroma client"""
+    generator = PDFGenerator()
+    try:
+        assert generator._get_pool().submit(app_modules_in_worker).result(timeout=60) == []
+    finally:
+        generator.shutdown()
@@ -0,0 +1,37 @@
+import asyncio
+from config.settings import settings
+from backend.src.services.search import WebSearchService, search_service
+
+
+def test_normalize_ignores_case_unicode_form_and_whitespace():
+    """Queries differing only in case, Unicode form or spacing normalize alike"""
+    assert WebSearchService._normalize("  Quantum\tComputing \n NEWS ") == "quantum computing news"
+    assert WebSearchService._normalize("Straße") == WebSearchService._normalize("STRASSE")
+    assert WebSearchService._normalize("caf\u00e9") == WebSearchService._normalize("cafe\u0301")
+    assert WebSearchService._normalize("ＡＩ trends") == "ai trends"
+
+
+def test_cache_key_matches_equivalent_queries():
+    """Equivalent queries share a key; a different query or limit does not"""
+    key = search_service._cache_key("Quantum  Computing", 5)
+    
+    assert key == search_service._cache_key(" quantum computing ", 5)
+    assert key != search_service._cache_key("quantum computing", 10)
+    assert key != search_service._cache_key("quantum computers", 5)
+    assert len(key) == 24
+
+
+def test_tavily_semaphore_created_per_event_loop():
+    """The concurrency limiter is created lazily for the loop that uses it"""
+    service = WebSearchService()
+    assert service._semaphore is None
+    
+    async def get_twice():
+        return service._get_semaphore(), service._get_semaphore()
+    
+    first, same = asyncio.run(get_twice())
+    second, _ = asyncio.run(get_twice())
+    
+    assert first is same
+    assert second is not first
+    assert second._value == settings.TAVILY_CONCURRENCY
@@ -0,0 +1,43 @@
+import numpy as np
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from config.settings import settings
+from backend.src.services import vector_store as vector_store_module
+from backend.src.services.vector_store import VectorStore, RESEARCH_COLLECTION, LEGACY_RESEARCH_COLLECTION
+
+
+def test_legacy_collection_is_migrated_to_cosine(tmp_path, monkeypatch):
+    """Entries in the legacy L2 collection move to the cosine collection once"""
+    db_path = str(tmp_path / "chroma_db")
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", db_path)
+    embedded = []
+    
+    def fake_embed(texts):
+        embedded.extend(texts)
+        return np.array([[0.0, 1.0]] * len(texts), dtype=np.float32)
+    
+    monkeypatch.setattr(vector_store_module, "embed", fake_embed)
+    
+    client = chromadb.PersistentClient(path=db_path, settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+    legacy = client.create_collection(LEGACY_RESEARCH_COLLECTION)
+    legacy.add(
+        ids=["research_1"],
+        embeddings=[[0.6, 0.8]],
+        documents=['{"summary": "Legacy summary", "topic": "Legacy topic"}'],
+        metadatas=[{"research_id": "research_1", "topic": "Legacy topic", "summary": "Legacy summary"}]
+    )
+    
+    store = VectorStore()
+    assert LEGACY_RESEARCH_COLLECTION in {collection.name for collection in store.client.list_collections()}
+    store.migrate_legacy_collection()
+    
+    names = {collection.name for collection in store.client.list_collections()}
+    assert LEGACY_RESEARCH_COLLECTION not in names
+    assert store.collection.name == RESEARCH_COLLECTION
+    assert store.collection.metadata["hnsw:space"] == "cosine"
+    migrated = store.collection.get(ids=["research_1"], include=["metadatas", "embeddings"])
+    assert migrated["metadatas"][0]["topic"] == "Legacy topic"
+    
+    # Re-embedded from topic + summary instead of keeping the legacy embedding
+    assert embedded == ["Legacy topic\n\nLegacy summary"]
+    assert migrated["embeddings"][0] == [0.0, 1.0]